@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',  # runserver serves static files the way production does
     'django.contrib.staticfiles', 
     
     #installed apps  
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,9 +83,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Sales older than the archive cutoff (see `manage.py archive_sales`)
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'archive.sqlite3',
+    },
 }
 
+# Read-only copy of the main database for reports and exports, so their long
+# reads never hold up a sale. Refreshed by `manage.py refresh_reporting_snapshot`.
+REPORTING_SNAPSHOT_PATH = BASE_DIR / 'reporting.sqlite3'
+DATABASES['reporting'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': f'file:{REPORTING_SNAPSHOT_PATH}?mode=ro',
+    'OPTIONS': {'uri': True},
+    'CONN_MAX_AGE': 0,  # Reconnect per request, so a refreshed snapshot is picked up at once
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['users.routers.ArchiveRouter', 'users.routers.ReportingRouter']
+
+# PRAGMAs applied to every new SQLite connection (see users/db.py)
+SQLITE_PRAGMAS = {}
+
+# DJANGO_DB_PROFILE=production tunes SQLite for several gunicorn workers:
+# WAL lets readers run alongside the sale writer, busy_timeout waits for the
+# write lock instead of failing with "database is locked", and BEGIN IMMEDIATE
+# takes that lock up front so transactions never deadlock upgrading to it.
+if os.environ.get('DJANGO_DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # milliseconds
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative means KiB, so 64 MiB
+        'temp_store': 'MEMORY',
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -119,6 +162,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes hashed copies of every file plus .gz/.br versions next to
+# them; WhiteNoise serves those precompressed, with a far-future immutable
+# Cache-Control, so browsers never re-download an unchanged asset.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -131,4 +187,61 @@ AUTH_USER_MODEL = 'users.User'
 
 LOGIN_URL = '/login/'
 
-MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
\ No newline at end of file
+# Per-process cache of logged-in users (users/auth.py). Saving a User bumps
+# its version in the shared AUTH_USER_CACHE_ALIAS cache, which every worker
+# checks on each request; the timeout only bounds how long an entry lives.
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_SIZE = 1000
+AUTH_USER_CACHE_ALIAS = 'auth'
+
+# DJANGO_AUTH_PROFILE=production takes the database out of authenticated
+# requests: the session lives in a signed cookie instead of django_session,
+# and the logged-in user comes from the per-process user cache.
+if os.environ.get('DJANGO_AUTH_PROFILE') == 'production':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    AUTHENTICATION_BACKENDS = ['users.auth.CachedModelBackend']
+
+# Cache for computed sales reports. Use a backend shared by all workers
+# (file, memcached, redis) so signal-driven invalidation reaches every one.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'reports',
+    },
+    # User versions of the per-process user cache; must be shared the same way
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'auth',
+    },
+}
+REPORTS_CACHE_ALIAS = 'reports'
+REPORTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Opt-in per-request query and latency instrumentation (users/middleware.py).
+# Thresholds decide which requests get logged to the "users.performance" logger.
+PERF_INSTRUMENTATION = os.environ.get('DJANGO_PERF_INSTRUMENTATION') == '1'
+PERF_WINDOW = 500  # requests kept per view for the rolling percentiles
+PERF_SLOW_REQUEST_MS = 500
+PERF_MAX_QUERIES = 30
+
+if PERF_INSTRUMENTATION:
+    MIDDLEWARE.append('users.middleware.QueryInstrumentationMiddleware')
+
+# Background jobs (users/jobs.py), run by `manage.py run_jobs`: where finished
+# CSVs are kept, how many jobs one worker runs at once, how long a running job
+# may go without reporting progress before it is failed, and how long finished
+# jobs and their files are kept.
+JOB_RESULTS_DIR = BASE_DIR / 'job_results'
+JOB_WORKER_THREADS = 2
+JOB_STALE_AFTER = 10 * 60  # seconds
+JOB_KEEP_DAYS = 7
+
+# Products per page of the product list
+PRODUCTS_PAGE_SIZE = 50
+
+# Keyset pagination of the transaction list
+TRANSACTIONS_PAGE_SIZE = 50
+TRANSACTIONS_MAX_PAGE_SIZE = 500
@@ -1,5 +1,17 @@
-from django.contrib import admin
-from .models import User, Products, Sale
+import csv
+import io
+from datetime import datetime, time, timedelta
+
+from django.contrib import admin, messages
+from django.db.models import Max, Min
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.urls import path
+from django.utils.timezone import localtime, make_aware
+from .forms import SaleImportForm, StockAdjustmentActionForm
+from .imports import import_sales, write_rejects
+from .models import User, Products, Sale, SaleQuerySet
+from .pagination import EstimatedCountPaginator
 from django.contrib.auth.admin import UserAdmin
 # Register your models here.
 
@@ -25,8 +37,128 @@ class CustomUserAdmin(UserAdmin):
     ordering = ('username',)
     
 
+def _bucket(moment, kind):
+    """ The [start, end) of the local year, month or day containing `moment`. """
+    day = localtime(moment).date()
+    if kind == 'year':
+        start = day.replace(month=1, day=1)
+        end = start.replace(year=start.year + 1)
+    elif kind == 'month':
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        start, end = day, day + timedelta(days=1)
+    return make_aware(datetime.combine(start, time.min)), make_aware(datetime.combine(end, time.min))
+
+
+class SaleChangeListQuerySet(SaleQuerySet):
+    """
+    The Sale changelist's queryset. Its date hierarchy links are found by
+    seeking the sale_date index once per year/month/day that has sales,
+    rather than truncating the date of every row in the table.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        # SQLite answers MIN() or MAX() from an index only when it is alone in the query
+        if not args and len(kwargs) > 1 and all(isinstance(value, (Min, Max)) for value in kwargs.values()):
+            return {name: super(SaleChangeListQuerySet, self).aggregate(**{name: value})[name]
+                    for name, value in kwargs.items()}
+        return super().aggregate(*args, **kwargs)
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if field_name != 'sale_date' or kind not in ('year', 'month', 'day') or order != 'ASC':
+            return super().datetimes(field_name, kind, order, tzinfo)
+
+        rows = self.order_by()
+        buckets = []
+        first = rows.aggregate(first=Min('sale_date'))['first']
+        while first is not None:
+            start, end = _bucket(first, kind)
+            buckets.append(localtime(start))
+            first = rows.filter(sale_date__gte=end).aggregate(first=Min('sale_date'))['first']
+        return buckets
+
+
+class SaleAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/users/sale/change_list.html'
+    list_display = ('id', 'sale_date', 'product', 'quantity', 'selling_price', 'customer_details', 'mode_of_payment')
+    list_select_related = ('product',)
+    date_hierarchy = 'sale_date'
+    ordering = ('-sale_date', '-id')
+    raw_id_fields = ('product', 'customer')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return SaleChangeListQuerySet(self.model, query=queryset.query, using=queryset.db)
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='users_sale_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """ Bulk-imports sales from an uploaded CSV; rejected rows come back as a CSV download. """
+        if not self.has_add_permission(request):
+            return redirect('admin:users_sale_changelist')
+
+        if request.method == 'POST':
+            form = SaleImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                source = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+                imported, rejects = import_sales(csv.DictReader(source))
+                self.message_user(request, f"Imported {imported} sales.", messages.SUCCESS)
+
+                if rejects:
+                    self.message_user(request, f"Rejected {len(rejects)} rows.", messages.WARNING)
+                    response = HttpResponse(content_type='text/csv')
+                    response['Content-Disposition'] = 'attachment; filename="sales_rejects.csv"'
+                    write_rejects(rejects, csv.writer(response))
+                    return response
+
+                return redirect('admin:users_sale_changelist')
+        else:
+            form = SaleImportForm()
+
+        return render(request, 'admin/users/sale/import_sales.html', {
+            **self.admin_site.each_context(request),
+            'form': form,
+            'opts': self.model._meta,
+            'title': 'Import sales',
+        })
+
+
+class ProductsAdmin(admin.ModelAdmin):
+    list_display = ('name', 'price', 'cost_price', 'stock', 'updated_at')
+    search_fields = ('name',)
+    ordering = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = StockAdjustmentActionForm
+    actions = ['adjust_stock']
+
+    @admin.action(description="Adjust stock of selected products", permissions=['change'])
+    def adjust_stock(self, request, queryset):
+        """ Adds the action bar's amount to every selected product in one UPDATE. """
+        try:
+            amount = int(request.POST.get('amount', ''))
+        except ValueError:
+            amount = 0
+        if not amount:
+            self.message_user(request, "Enter a non-zero whole number of units to adjust by.", messages.ERROR)
+            return
+
+        adjusted = queryset.adjust_stock(amount, note=f"admin: {request.user.username}")
+        skipped = queryset.count() - adjusted
+        self.message_user(request, f"Adjusted stock of {adjusted} products by {amount:+}.", messages.SUCCESS)
+        if skipped:
+            self.message_user(request, f"Skipped {skipped} products without enough stock.", messages.WARNING)
+
+
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(Sale)
+admin.site.register(Sale, SaleAdmin)
 
 
-admin.site.register(Products)
\ No newline at end of file
+admin.site.register(Products, ProductsAdmin)
\ No newline at end of file
@@ -0,0 +1,215 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db.models import F, Sum, ExpressionWrapper, FloatField
+from django.db.models.functions import TruncHour, TruncWeek
+from django.utils.timezone import localdate, localtime, make_aware
+
+from .models import Products, Sale, DailyProductSales
+from .reports import MONEY
+
+
+# How sales can be bucketed, with the numpy unit and width of one bucket
+BUCKETS = {
+    "hour": ("h", 1),
+    "day": ("D", 1),
+    "week": ("D", 7),
+}
+
+# Widest series one request may ask for. Hours are truncated row by row from
+# the raw sales, so they get the shortest window (31 days)
+MAX_BUCKETS = {
+    "hour": 24 * 31,
+    "day": 3 * 366,
+    "week": 520,
+}
+
+# Reorder suggestions: days of history the sales velocity is measured over,
+# days a supplier takes to deliver, days of sales an order should cover, and
+# the z-score of the safety stock (1.65 ~ 95% of lead times without a stockout)
+VELOCITY_LOOKBACK_DAYS = 28
+REORDER_LEAD_DAYS = 7
+REORDER_COVER_DAYS = 30
+SAFETY_STOCK_Z = 1.65
+
+
+def bucket_starts(start, end, bucket):
+    """ Start of every bucket overlapping the [start, end) dates, as numpy datetime64. """
+    unit, width = BUCKETS[bucket]
+    if bucket == "week":
+        start -= timedelta(days=start.weekday())  # TruncWeek buckets start on Monday
+    return np.arange(np.datetime64(start, unit), np.datetime64(end, unit), np.timedelta64(width, unit))
+
+
+def _bucketed_rows(start, end, bucket, product_ids, by_product=True):
+    """
+    One query grouping sales by (product, bucket), or by bucket alone. Days
+    and weeks come from the DailyProductSales rollup; only hours need the raw
+    Sale rows.
+    """
+    if bucket == "hour":
+        rows = Sale.objects.filter(
+            sale_date__gte=make_aware(datetime.combine(start, time.min)),
+            sale_date__lt=make_aware(datetime.combine(end, time.min)),
+        ).annotate(bucket=TruncHour("sale_date"))
+        revenue = ExpressionWrapper(F("quantity") * F("selling_price"), output_field=MONEY)
+    else:
+        # A rollup date already is its own day bucket
+        rows = DailyProductSales.objects.filter(date__gte=start, date__lt=end).annotate(
+            bucket=TruncWeek("date") if bucket == "week" else F("date")
+        )
+        revenue = F("revenue")
+
+    if product_ids is not None:
+        rows = rows.filter(product_id__in=product_ids)
+    group = ("product_id", "bucket") if by_product else ("bucket",)
+    return (
+        rows.values(*group)
+        .annotate(units=Sum("quantity"), amount=Sum(revenue, output_field=FloatField()))
+        .order_by()
+        .values_list(*group, "units", "amount")
+    )
+
+
+def _columns(stamps, buckets, bucket):
+    """ Column of each row's bucket start in the dense `buckets` axis. """
+    unit, width = BUCKETS[bucket]
+    if bucket == "hour":
+        stamps = [localtime(stamp).replace(tzinfo=None) for stamp in stamps]
+    stamps = np.array(stamps, dtype=f"datetime64[{unit}]")
+    return ((stamps - buckets[0]) // np.timedelta64(width, unit)).astype(np.intp)
+
+
+def _checked_buckets(start, end, bucket):
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown analytics bucket: {bucket}")
+    buckets = bucket_starts(start, end, bucket)
+    if len(buckets) > MAX_BUCKETS[bucket]:
+        raise ValueError(f"{len(buckets)} {bucket} buckets is more than the limit of {MAX_BUCKETS[bucket]}")
+    return buckets
+
+
+def sales_totals(start, end, bucket="day", product_ids=None):
+    """
+    Sales between the `start` and `end` dates (half-open) summed over the
+    given products (all by default), one value per bucket, empty buckets
+    included as zeros.
+
+    Returns {"buckets": datetime64 array, "quantity": int array, "revenue": float array}.
+    """
+    buckets = _checked_buckets(start, end, bucket)
+    rows = list(_bucketed_rows(start, end, bucket, product_ids, by_product=False))
+    stamps, units, amounts = zip(*rows) if rows else ((), (), ())
+
+    quantity = np.zeros(len(buckets), dtype=np.int64)
+    revenue = np.zeros(len(buckets), dtype=np.float64)
+    columns = _columns(stamps, buckets, bucket)
+    quantity[columns] = np.array(units, dtype=np.int64)
+    revenue[columns] = np.array(amounts, dtype=np.float64)
+    return {"buckets": buckets, "quantity": quantity, "revenue": revenue}
+
+
+def sales_matrix(start, end, bucket="day", product_ids=None):
+    """
+    Sales between the `start` and `end` dates (half-open) as dense
+    products x buckets arrays, buckets with no sales included as zeros.
+
+    Returns {"products": [(id, name, stock), ...], "buckets": datetime64 array,
+    "quantity": int array, "revenue": float array, "stock": int array}, with
+    one row per product in the order of "products".
+    """
+    buckets = _checked_buckets(start, end, bucket)
+
+    catalog = Products.objects.order_by("name", "id")
+    if product_ids is not None:
+        catalog = catalog.filter(pk__in=product_ids)
+    products = list(catalog.values_list("id", "name", "stock"))
+    row_of = {product[0]: row for row, product in enumerate(products)}
+
+    rows = list(_bucketed_rows(start, end, bucket, product_ids))
+    product_ids, stamps, units, amounts = zip(*rows) if rows else ((), (), (), ())
+    product_rows = np.array([row_of[product_id] for product_id in product_ids], dtype=np.intp)
+    columns = _columns(stamps, buckets, bucket)
+
+    quantity = np.zeros((len(products), len(buckets)), dtype=np.int64)
+    revenue = np.zeros((len(products), len(buckets)), dtype=np.float64)
+    quantity[product_rows, columns] = np.array(units, dtype=np.int64)
+    revenue[product_rows, columns] = np.array(amounts, dtype=np.float64)
+
+    return {
+        "products": products,
+        "buckets": buckets,
+        "quantity": quantity,
+        "revenue": revenue,
+        "stock": np.array([product[2] for product in products], dtype=np.int64),
+    }
+
+
+def _window_sums(values, window):
+    """ Sum of each trailing `window` along the last axis; NaN until a full window exists. """
+    values = np.asarray(values, dtype=np.float64)
+    totals = np.cumsum(values, axis=-1)
+    padded = np.concatenate([np.zeros(values.shape[:-1] + (1,)), totals], axis=-1)
+    sums = np.full(values.shape, np.nan)
+    if window <= values.shape[-1]:
+        sums[..., window - 1:] = padded[..., window:] - padded[..., :-window]
+    return sums
+
+
+def rolling_mean(values, window):
+    """ Trailing moving average along the last axis, for every row at once. """
+    return _window_sums(values, window) / window
+
+
+def rolling_std(values, window):
+    """ Trailing moving (population) standard deviation along the last axis. """
+    mean = rolling_mean(values, window)
+    mean_of_squares = _window_sums(np.square(np.asarray(values, dtype=np.float64)), window) / window
+    return np.sqrt(np.maximum(mean_of_squares - np.square(mean), 0))
+
+
+def as_list(values):
+    """ An array as plain floats for templates, with NaN and infinity as None. """
+    return [float(value) if np.isfinite(value) else None for value in values]
+
+
+def reorder_suggestions(today=None, lookback_days=VELOCITY_LOOKBACK_DAYS,
+                        lead_days=REORDER_LEAD_DAYS, cover_days=REORDER_COVER_DAYS):
+    """
+    Days-until-stockout and reorder quantities for every product.
+
+    Velocity is the mean daily units sold over the last `lookback_days`
+    (today included), and its day-to-day spread sizes a safety stock for the
+    delivery lead time. A product needs reordering once its stock is at or
+    below its reorder point; the suggested quantity tops it up to
+    `cover_days` of sales after delivery. Returned rows are sorted by how
+    soon the product runs out.
+    """
+    today = today or localdate()
+    series = sales_matrix(today - timedelta(days=lookback_days - 1), today + timedelta(days=1), "day")
+    quantity, stock = series["quantity"], series["stock"]
+
+    velocity = quantity.mean(axis=1)
+    safety = SAFETY_STOCK_Z * quantity.std(axis=1) * np.sqrt(lead_days)
+    reorder_point = velocity * lead_days + safety
+    with np.errstate(divide="ignore"):
+        days_left = np.where(velocity > 0, stock / velocity, np.inf)
+    suggested = np.ceil(np.maximum(velocity * (lead_days + cover_days) + safety - stock, 0)).astype(np.int64)
+    needs_reorder = (velocity > 0) & (stock <= reorder_point)
+
+    return [
+        {
+            "id": series["products"][row][0],
+            "name": series["products"][row][1],
+            "stock": int(stock[row]),
+            "velocity": float(velocity[row]),
+            "days_left": float(days_left[row]) if np.isfinite(days_left[row]) else None,
+            "stockout_date": (
+                today + timedelta(days=int(days_left[row])) if np.isfinite(days_left[row]) else None
+            ),
+            "reorder_point": int(np.ceil(reorder_point[row])),
+            "suggested_quantity": int(suggested[row]),
+            "needs_reorder": bool(needs_reorder[row]),
+        }
+        for row in np.argsort(days_left, kind="stable")
+    ]
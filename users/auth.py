@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import User
+
+
+# user_id -> (loaded at, version, User), for this process only
+_users = {}
+_users_lock = threading.Lock()
+
+
+def _versions():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f"auth:user:v:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps the users it loads for a request in a small
+    per-process cache, so an authenticated request does not have to read
+    users_user again.
+
+    Every entry remembers the user's version in the shared
+    AUTH_USER_CACHE_ALIAS cache, which is bumped whenever the User is saved
+    or deleted in any process (see the receivers below). A request whose
+    user's version moved on reloads it, so a role change, a deactivation or
+    a password change (which ends the user's other sessions) reaches every
+    worker on its next request. Entries are also reloaded once they are
+    AUTH_USER_CACHE_TIMEOUT seconds old.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        # Read before loading the user, so a change committed meanwhile
+        # leaves the entry one version behind and reloaded next time
+        version = _versions().get(_version_key(user_id), 0)
+        with _users_lock:
+            loaded_at, cached_version, user = _users.get(user_id, (None, None, None))
+        if (
+            user is None
+            or cached_version != version
+            or time.monotonic() - loaded_at > settings.AUTH_USER_CACHE_TIMEOUT
+        ):
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            with _users_lock:
+                if len(_users) >= settings.AUTH_USER_CACHE_SIZE:
+                    _users.clear()
+                _users[user_id] = (time.monotonic(), version, user)
+
+        # Each request gets its own copy, so nothing one view sets on
+        # request.user (permission caches included) leaks into another
+        return copy.copy(user)
+
+
+def forget_user(user_id):
+    """ Makes every process reload the user on its next request. """
+    with _users_lock:
+        _users.pop(user_id, None)
+    versions = _versions()
+    key = _version_key(user_id)
+    versions.add(key, 0, None)
+    try:
+        versions.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); any other value is just as good
+        versions.set(key, time.time_ns(), None)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _forget_changed_user(sender, instance, **kwargs):
+    # After the commit, so no worker reloads the old row under the new version
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Products
+
+
+# Products shown in the lowest-stock list of the shopkeeper dashboard
+LOW_STOCK_LIMIT = 10
+
+
+def search_products(query=""):
+    """ Product listing rows, optionally filtered by name, without the description. """
+    products = Products.objects.only("name", "price", "stock").order_by("name", "id")
+    if query:
+        products = products.filter(name__icontains=query)
+    return products
+
+
+def low_stock_products(limit=LOW_STOCK_LIMIT):
+    return Products.objects.order_by("stock", "name").values("id", "name", "stock")[:limit]
+
+
+def catalog_choices():
+    """
+    Compact (id, name, stock) tuples of every product, for dropdowns.
+
+    The list is cached under the catalog's max(updated_at) and row count,
+    which a stock change, edit, addition or deletion always moves, so one
+    small aggregate replaces reading the whole table on every form render.
+    """
+    state = Products.objects.aggregate(latest=Max("updated_at"), count=Count("id"))
+    key = f"catalog:choices:{state['latest'].isoformat() if state['latest'] else ''}:{state['count']}"
+
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(Products.objects.order_by("name").values_list("id", "name", "stock"))
+        cache.set(key, choices)
+    return choices
+
+
+def product_choice_field_choices():
+    """ catalog_choices() labelled for a product <select>. """
+    return [("", "---------")] + [
+        (product_id, f"{name} ({stock} in stock)") for product_id, name, stock in catalog_choices()
+    ]
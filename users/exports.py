@@ -0,0 +1,169 @@
+import csv
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.db.models import F, Q, ExpressionWrapper
+from django.http import StreamingHttpResponse
+from django.utils.timezone import make_aware
+
+from .models import Customer, Sale, ArchivedSale, ArchivedDailySales
+from .reports import GROUPINGS, MONEY
+
+
+# Rows fetched from the database per round-trip while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+TRANSACTION_EXPORT_HEADER = [
+    "Date", "Product", "Quantity", "Selling Price", "Total Price", "Total Profit",
+    "Customer", "Mode of Payment",
+]
+
+
+# Query string parameters that filter the transaction list and its export
+TRANSACTION_FILTERS = ("customer", "customer_id", "product", "date")
+
+
+class _Echo:
+    """ A file-like object whose write() just hands the CSV line back. """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    """
+    Returns a StreamingHttpResponse that writes `rows` as CSV lazily.
+
+    Nothing is buffered beyond the current row, so the download starts at
+    once and memory stays flat however many rows the iterable yields.
+    """
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _parse_id(value):
+    """ The positive integer id in `value`, or None when it is malformed or would not fit in an id column. """
+    try:
+        pk = int(value)
+    except ValueError:
+        return None
+    return pk if 0 < pk < 2 ** 63 else None
+
+
+def filter_transactions(query, transactions):
+    """ Applies the customer, product and date filters in `query` (e.g. request.GET) to a Sale or ArchivedSale queryset. """
+    customer = query.get('customer', '')
+    customer_id = _parse_id(query.get('customer_id', ''))
+    product_id = _parse_id(query.get('product', ''))
+    date = query.get('date', '')
+
+    # Customer names match by prefix through the indexed search key; a
+    # malformed customer_id or product is ignored like an invalid date
+    if customer_id:
+        transactions = transactions.filter(customer_id=customer_id)
+    elif customer:
+        customers = Customer.objects.prefix_search(customer).values('pk')
+        if transactions.model is ArchivedSale:
+            customers = list(customers.values_list('pk', flat=True))  # Another database; no subquery
+        transactions = transactions.filter(customer_id__in=customers)
+
+    if product_id:
+        transactions = transactions.filter(product_id=product_id)
+
+    if date:
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d").date()
+            transactions = transactions.filter(
+                sale_date__gte=make_aware(datetime.combine(day, time.min)),
+                sale_date__lt=make_aware(datetime.combine(day + timedelta(days=1), time.min)),
+            )
+        except ValueError:
+            pass  # Ignore invalid date input
+
+    return transactions
+
+
+def transactions_to_export(query):
+    """
+    The Sale and ArchivedSale querysets of every transaction matching
+    `query`. Backdated imports can put hot sales among archived ones, so
+    exports interleave the two with newest_first rather than writing one
+    after the other.
+    """
+    transactions = [filter_transactions(query, Sale.objects.all())]
+    if ArchivedDailySales.objects.exists():
+        transactions.append(filter_transactions(query, ArchivedSale.objects.all()))
+    return transactions
+
+
+def sales_report_header(group_by):
+    return ["Period", GROUPINGS[group_by], "Total Quantity", "Total Price", "Total Profit"]
+
+
+def sales_report_rows(report):
+    """ Flattens a build_report result into CSV rows matching sales_report_header. """
+    return (
+        (period, row["label"], row["total_quantity"], row["total_revenue"], row["total_profit"])
+        for period, section in report.items()
+        for row in section["rows"]
+    )
+
+
+def transactions_for_export(transactions, *extra):
+    """
+    Projects a Sale or ArchivedSale queryset onto flat tuples matching
+    TRANSACTION_EXPORT_HEADER, followed by any `extra` fields.
+    """
+    product_name = "product_name" if transactions.model is ArchivedSale else "product__name"
+    return (
+        transactions
+        .annotate(
+            total_price=ExpressionWrapper(F("quantity") * F("selling_price"), output_field=MONEY),
+            total_profit=ExpressionWrapper(
+                F("quantity") * (F("selling_price") - F("unit_cost")),
+                output_field=MONEY,
+            ),
+        )
+        .order_by("-sale_date", "-id")
+        .values_list(
+            "sale_date", product_name, "quantity", "selling_price", "total_price", "total_profit",
+            "customer_details", "mode_of_payment", *extra,
+        )
+    )
+
+
+def newest_first(streams):
+    """
+    Merges row streams that are each newest first, such as
+    transactions_for_export(queryset, "id") of the hot and archived sales,
+    into one newest-first stream on (sale_date, id). The trailing id of
+    each row is dropped.
+    """
+    merged = heapq.merge(*streams, key=lambda row: (row[0], row[-1]), reverse=True)
+    return (row[:-1] for row in merged)
+
+
+def transaction_chunks(transactions, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the rows of transactions_for_export(transactions, "id"), newest
+    first, one keyset query on (sale_date, id) per chunk. Unlike .iterator(),
+    no read stays open between chunks, so a long export never holds SQLite's
+    read lock while other connections wait to write.
+    """
+    position = Q()
+    while True:
+        chunk = list(transactions_for_export(transactions.filter(position), "id")[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        sale_date, pk = chunk[-1][0], chunk[-1][-1]
+        # The leading sale_date bound lets SQLite seek the index instead of scanning up to the position
+        position = Q(sale_date__lte=sale_date) & (Q(sale_date__lt=sale_date) | Q(id__lt=pk))
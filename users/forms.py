@@ -1,5 +1,7 @@
 from django import forms 
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm  
+from .catalog import product_choice_field_choices
 from .models import User, Products, Sale
 
 class RegisterationForm(UserCreationForm):
@@ -27,12 +29,48 @@ class SalesForm(forms.ModelForm):
     class Meta:
         model = Sale
         fields = ['product', 'quantity','selling_price','mode_of_payment', 'customer_details']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Render from the cached compact catalog; only the chosen product is fetched on submit
+        self.fields['product'].queryset = Products.objects.only('name', 'cost_price', 'stock')
+        self.fields['product'].choices = product_choice_field_choices()
         
     def clean_quantity(self):
         quantity = self.cleaned_data.get('quantity')
         product = self.cleaned_data.get('product')
         
-        if quantity > product.stock:
+        if product and quantity > product.stock:
             raise forms.ValidationError("Not enough stock available")
         
-        return quantity
\ No newline at end of file
+        return quantity
+
+class SaleImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="Sales CSV",
+        help_text="Columns: product (id or name), quantity, selling_price, customer_details, mode_of_payment, sale_date (optional).",
+    )
+
+
+class BasketForm(forms.Form):
+    customer_details = forms.CharField(max_length=70)
+    mode_of_payment = forms.CharField(max_length=20)
+
+
+class BasketLineForm(forms.Form):
+    product = forms.ModelChoiceField(queryset=Products.objects.only('name', 'cost_price', 'stock'))
+    quantity = forms.IntegerField(min_value=1)
+    selling_price = forms.DecimalField(max_digits=8, decimal_places=2, min_value=0)
+
+    def __init__(self, *args, product_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The formset passes one shared list so the catalog is read once per page
+        self.fields['product'].choices = product_choices or product_choice_field_choices()
+
+
+BasketLineFormSet = forms.formset_factory(BasketLineForm, extra=4, min_num=1, validate_min=True)
+
+
+class StockAdjustmentActionForm(ActionForm):
+    """ Admin action bar field for the bulk stock adjustment. """
+    amount = forms.IntegerField(required=False, help_text="Units to add; negative to remove")
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import now, localdate, is_naive, make_aware
+
+from .models import Customer, Products, Sale, DailyProductSales
+from .signals import sales_bulk_recorded
+
+
+IMPORT_COLUMNS = ["product", "quantity", "selling_price", "customer_details", "mode_of_payment", "sale_date"]
+
+# Sales inserted per INSERT statement
+IMPORT_BATCH_SIZE = 1000
+
+
+class _RejectedRow(Exception):
+    pass
+
+
+def _parse_row(row, products, by_name):
+    """ Validates one CSV row. Returns (product, quantity, price, customer, payment, sale_date). """
+    reference = (row.get("product") or "").strip()
+    # isdecimal, not isdigit: "²" is a digit that int() rejects
+    product = products.get(int(reference)) if reference.isdecimal() else by_name.get(reference.lower())
+    if product is None:
+        raise _RejectedRow(f"Unknown product: {reference!r}")
+
+    try:
+        quantity = int(row.get("quantity") or "")
+    except ValueError:
+        raise _RejectedRow("Quantity must be a whole number")
+    if quantity <= 0:
+        raise _RejectedRow("Quantity must be positive")
+
+    try:
+        price = Decimal(row.get("selling_price") or "").quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise _RejectedRow("Selling price must be a number")
+    if not price.is_finite():  # NaN survives quantize(), then breaks the comparisons below
+        raise _RejectedRow("Selling price must be a number")
+    if price < 0 or price >= Decimal("1000000"):
+        raise _RejectedRow("Selling price out of range")
+
+    customer = (row.get("customer_details") or "").strip()
+    payment = (row.get("mode_of_payment") or "").strip()
+    if not customer or len(customer) > 70:
+        raise _RejectedRow("Customer details must be 1-70 characters")
+    if not payment or len(payment) > 20:
+        raise _RejectedRow("Mode of payment must be 1-20 characters")
+
+    raw_date = (row.get("sale_date") or "").strip()
+    if raw_date:
+        try:
+            sale_date = parse_datetime(raw_date) or parse_date(raw_date)
+        except ValueError:
+            sale_date = None
+        if sale_date is None:
+            raise _RejectedRow(f"Invalid sale date: {raw_date!r}")
+        if not isinstance(sale_date, datetime):
+            sale_date = datetime.combine(sale_date, time.min)
+        if is_naive(sale_date):
+            sale_date = make_aware(sale_date)
+    else:
+        sale_date = now()
+
+    return product, quantity, price, customer, payment, sale_date
+
+
+def import_sales(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Imports sales from an iterable of CSV dict rows in a single transaction.
+
+    Rows are validated against one prefetched map of products, and against
+    the stock still left once earlier rows are counted. Valid sales are then
+    written with bulk_create, each product's stock is taken with a single
+    conditional UPDATE for its whole quantity, and the daily rollup gets one
+    increment per (day, product).
+
+    Returns (imported_count, rejects), where rejects is a list of
+    (line_number, row, reason) for every row that was skipped.
+    """
+    products = {product.pk: product for product in Products.objects.only("name", "cost_price", "stock")}
+    by_name = {product.name.lower(): product for product in products.values()}
+    available = {pk: product.stock for pk, product in products.items()}
+
+    accepted = []
+    rejects = []
+    for line_number, row in enumerate(rows, start=2):  # Line 1 is the header
+        try:
+            parsed = _parse_row(row, products, by_name)
+        except _RejectedRow as reason:
+            rejects.append((line_number, row, str(reason)))
+            continue
+
+        product, quantity = parsed[0], parsed[1]
+        if available[product.pk] < quantity:
+            rejects.append((line_number, row, f"Not enough stock for {product.name}"))
+            continue
+        available[product.pk] -= quantity
+        accepted.append((line_number, row, parsed))
+
+    with transaction.atomic():
+        # One UPDATE per product; a product that sold out meanwhile loses all its rows
+        sold = defaultdict(int)
+        for _, _, parsed in accepted:
+            sold[parsed[0].pk] += parsed[1]
+        sold_out = {
+            pk for pk, quantity in sold.items()
+            if not Products.objects.decrement_stock(pk, quantity, note="import")
+        }
+        if sold_out:
+            rejects.extend(
+                (line_number, row, f"Not enough stock for {parsed[0].name}")
+                for line_number, row, parsed in accepted if parsed[0].pk in sold_out
+            )
+            accepted = [entry for entry in accepted if entry[2][0].pk not in sold_out]
+
+        customers = Customer.objects.resolve(parsed[3] for _, _, parsed in accepted)
+        sales = (
+            Sale(product_id=product.pk, quantity=quantity, selling_price=price, unit_cost=product.cost_price,
+                 customer=customers[customer], customer_details=customer, mode_of_payment=payment,
+                 sale_date=sale_date)
+            for _, _, (product, quantity, price, customer, payment, sale_date) in accepted
+        )
+        while batch := list(islice(sales, batch_size)):
+            Sale.objects.bulk_create(batch)
+
+        totals = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+        for _, _, (product, quantity, price, _, _, sale_date) in accepted:
+            entry = totals[(localdate(sale_date), product.pk)]
+            entry[0] += quantity
+            entry[1] += price * quantity
+            entry[2] += product.cost_price * quantity
+        for (day, product_id), (quantity, revenue, cost) in totals.items():
+            DailyProductSales.objects.add(day, product_id, quantity, revenue, cost)
+        sales_bulk_recorded.send(sender=Sale, days={day for day, _ in totals})
+
+    rejects.sort(key=lambda reject: reject[0])
+    return len(accepted), rejects
+
+
+def write_rejects(rejects, writer):
+    """ Writes rejected rows, with their line number and reason, to a csv.writer. """
+    writer.writerow(["line", *IMPORT_COLUMNS, "reason"])
+    for line_number, row, reason in rejects:
+        writer.writerow([line_number, *(row.get(column, "") for column in IMPORT_COLUMNS), reason])
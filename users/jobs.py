@@ -0,0 +1,118 @@
+import csv
+import logging
+import os
+from datetime import date
+
+from django.conf import settings
+from django.db import connections
+from django.utils.timezone import now
+
+from .exports import (
+    EXPORT_CHUNK_SIZE, TRANSACTION_EXPORT_HEADER, transactions_to_export, transaction_chunks, newest_first,
+    sales_report_header, sales_report_rows,
+)
+from .models import Job
+from .report_cache import cached_build_report
+from .reporting import use_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+# Rows written between two progress reports, which are also when a running
+# job notices it was cancelled
+PROGRESS_EVERY = EXPORT_CHUNK_SIZE
+
+# Name each kind's result is downloaded as
+RESULT_FILENAMES = {
+    Job.SALES_REPORT: "sales_report.csv",
+    Job.TRANSACTIONS: "transactions.csv",
+}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _sales_report(params):
+    periods = {
+        name: (date.fromisoformat(start), date.fromisoformat(end))
+        for name, (start, end) in params["periods"].items()
+    }
+    rows = list(sales_report_rows(cached_build_report(periods, params["group_by"])))
+    return sales_report_header(params["group_by"]), rows, len(rows)
+
+
+def _transactions(params):
+    # Chunked by keyset rather than .iterator(): a job runs for a long time
+    # and must not keep a read open while sales and its own progress are written
+    transactions = transactions_to_export(params)
+    rows = newest_first(transaction_chunks(queryset) for queryset in transactions)
+    return TRANSACTION_EXPORT_HEADER, rows, sum(queryset.count() for queryset in transactions)
+
+
+# What each kind of job computes: a function of the job's params returning
+# (CSV header, rows, number of rows)
+RUNNERS = {
+    Job.SALES_REPORT: _sales_report,
+    Job.TRANSACTIONS: _transactions,
+}
+
+
+def result_path(job):
+    return os.path.join(settings.JOB_RESULTS_DIR, f"{job.pk}.csv")
+
+
+def _write_result(job, path):
+    header, rows, total = RUNNERS[job.kind](job.params)
+    if not job.report_progress(0, total):
+        raise JobCancelled
+
+    processed = 0
+    with open(path, "w", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            processed += 1
+            if processed % PROGRESS_EVERY == 0 and not job.report_progress(processed):
+                raise JobCancelled
+    return processed
+
+
+def run_job(job):
+    """
+    Runs a claimed job: writes its CSV under JOB_RESULTS_DIR, reporting
+    progress as it goes, and records how it ended. Like the report and export
+    views, it reads from the reporting snapshot. Returns the final status.
+    """
+    path = result_path(job)
+    partial = f"{path}.partial"
+    try:
+        os.makedirs(settings.JOB_RESULTS_DIR, exist_ok=True)
+        with use_snapshot():
+            processed = _write_result(job, partial)
+        os.replace(partial, path)
+        outcome = {"status": Job.SUCCEEDED, "processed": processed, "total": processed}
+    except JobCancelled:
+        outcome = {"status": Job.CANCELLED}
+    except Exception as error:
+        logger.exception("Job %s failed", job.pk)
+        outcome = {"status": Job.FAILED, "error": f"{type(error).__name__}: {error}"}
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    try:
+        Job.objects.filter(pk=job.pk).update(finished_at=now(), updated_at=now(), **outcome)
+    finally:
+        connections.close_all()  # This thread's connections; the next job may run on another one
+    return outcome["status"]
+
+
+def prune_jobs(before):
+    """ Deletes jobs that finished before `before`, along with their result files. Returns how many. """
+    finished = Job.objects.filter(status__in=Job.FINISHED, finished_at__lt=before)
+    for job in finished.only("pk"):
+        if os.path.exists(result_path(job)):
+            os.remove(result_path(job))
+    return finished.delete()[0]
@@ -0,0 +1,89 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils.timezone import localdate, make_aware
+
+from users.models import Sale, ArchivedSale, ArchivedDailySales
+from users.routers import ARCHIVE_DB
+
+
+ARCHIVED_FIELDS = [
+    "id", "product_id", "quantity", "selling_price", "unit_cost", "customer_id",
+    "customer_details", "mode_of_payment", "sale_date", "created_at",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves sales older than a cutoff into the archive database, adding their totals "
+        "to the ArchivedDailySales summary kept in the main database. Safe to re-run "
+        "after an interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Archive sales before this day, YYYY-MM-DD.")
+        parser.add_argument("--older-than-days", type=int, default=365,
+                            help="Archive sales older than this many days (ignored with --before).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--vacuum", action="store_true",
+                            help="VACUUM the main database afterwards to give the space back.")
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                cutoff_day = datetime.strptime(options["before"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--before must be a date in YYYY-MM-DD format.")
+        else:
+            cutoff_day = localdate() - timedelta(days=options["older_than_days"])
+        cutoff = make_aware(datetime.combine(cutoff_day, time.min))
+
+        call_command("migrate", "users", database=ARCHIVE_DB, verbosity=0)
+
+        moved = 0
+        while True:
+            batch = list(
+                Sale.objects.filter(sale_date__lt=cutoff)
+                .order_by("sale_date", "id")
+                .values(*ARCHIVED_FIELDS, "product__name")[:options["batch_size"]]
+            )
+            if not batch:
+                break
+
+            # The archive copy commits first; the primary key makes a re-run after
+            # a crash skip rows that were copied but not yet removed here
+            with transaction.atomic(using=ARCHIVE_DB):
+                ArchivedSale.objects.bulk_create(
+                    [
+                        ArchivedSale(product_name=row["product__name"], **{field: row[field] for field in ARCHIVED_FIELDS})
+                        for row in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            totals = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+            for row in batch:
+                entry = totals[(localdate(row["sale_date"]), row["product_id"], row["mode_of_payment"])]
+                entry[0] += row["quantity"]
+                entry[1] += row["selling_price"] * row["quantity"]
+                entry[2] += row["unit_cost"] * row["quantity"]
+
+            with transaction.atomic():
+                ArchivedDailySales.objects.add_totals(totals)
+                # A raw DELETE skips the per-row post_delete signals: moving a sale
+                # changes no report total, so there is no cache to invalidate
+                archived = Sale.objects.filter(pk__in=[row["id"] for row in batch])
+                archived._raw_delete(archived.db)
+
+            moved += len(batch)
+            self.stdout.write(f"Archived {moved} sales...")
+
+        if options["vacuum"] and moved:
+            with connections["default"].cursor() as cursor:
+                cursor.execute("VACUUM")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} sales from before {cutoff_day}."))
@@ -0,0 +1,116 @@
+import json
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+
+from django.core.cache import caches
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from users.middleware import percentile
+from users.models import User, Products, Sale
+
+
+# Read paths measured, by view name, with the query string each is called with
+VIEWS = [
+    ("reports_view", ""),
+    ("reports_view", "?group_by=payment"),
+    ("transaction_list", ""),
+    ("product_list", ""),
+    ("shopkeeper_dashboard", ""),
+    ("api_transactions", ""),
+]
+
+
+@contextmanager
+def _counting_queries():
+    """ Counts the queries run inside the block on every database alias (default, archive and reporting). """
+    totals = {"queries": 0}
+
+    def count(execute, sql, params, many, context):
+        totals["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(count))
+        yield totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives the main read views through the test client and reports latency "
+        "percentiles and query counts per view, optionally saved as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Requests per view.")
+        parser.add_argument("--label", default="", help="Name for this run, e.g. a git revision.")
+        parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+        parser.add_argument("--compare", default=None, help="JSON results of an earlier run to diff against.")
+        parser.add_argument("--cold-reports", action="store_true",
+                            help="Clear the report cache before every request.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()  # Lets the test client through ALLOWED_HOSTS
+        user, _ = User.objects.get_or_create(
+            username="benchmark_views", defaults={"role": User.SHOPKEEPER, "is_staff": True},
+        )
+        client = Client()
+        client.force_login(user)
+
+        results = {}
+        for view_name, query in VIEWS:
+            url = reverse(view_name) + query
+            timings, query_counts = [], []
+            for _ in range(options["repeat"]):
+                if options["cold_reports"]:
+                    caches[settings.REPORTS_CACHE_ALIAS].clear()
+                with _counting_queries() as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    timings.append((time.perf_counter() - started) * 1000)
+                query_counts.append(queries["queries"])
+
+            results[url] = {
+                "status": response.status_code,
+                "p50_ms": round(percentile(timings, 0.50), 2),
+                "p95_ms": round(percentile(timings, 0.95), 2),
+                "p99_ms": round(percentile(timings, 0.99), 2),
+                "mean_ms": round(sum(timings) / len(timings), 2),
+                "queries": max(query_counts),
+            }
+
+        run = {
+            "label": options["label"],
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "data": {"products": Products.objects.count(), "sales": Sale.objects.count()},
+            "repeat": options["repeat"],
+            "views": results,
+        }
+
+        baseline = {}
+        if options["compare"]:
+            with open(options["compare"]) as source:
+                baseline = json.load(source)["views"]
+
+        self.stdout.write(f"{run['data']['sales']} sales, {run['data']['products']} products")
+        for url, stats in results.items():
+            line = (
+                f"{url:40} {stats['status']}  p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                f"p99 {stats['p99_ms']:8.2f} ms  {stats['queries']:3} queries"
+            )
+            if url in baseline:
+                line += f"  (p95 {stats['p95_ms'] - baseline[url]['p95_ms']:+.2f} ms)"
+            self.stdout.write(line)
+
+        if options["output"]:
+            with open(options["output"], "w") as target:
+                json.dump(run, target, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
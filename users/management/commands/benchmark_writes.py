@@ -0,0 +1,65 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, OperationalError
+
+from users.models import Products, Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures sale write throughput: several threads record one-unit sales "
+        "against a scratch product for a fixed time. Run it against a copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark measures the SQLite write path.")
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+
+        product = Products.objects.create(
+            name="benchmark_writes", cost_price=Decimal("1.00"), price=Decimal("2.00"),
+            description="Scratch product for benchmark_writes", stock=10 ** 9,
+        )
+        counts = {"sales": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options["seconds"]
+
+        def worker():
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        Sale(product=product, quantity=1, selling_price=Decimal("2.00"),
+                             customer_details="benchmark", mode_of_payment="cash").save()
+                        key = "sales"
+                    except OperationalError:
+                        key = "locked"
+                    with lock:
+                        counts[key] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        product.delete()  # Cascades to the benchmark's sales
+
+        self.stdout.write(
+            f"journal_mode={journal_mode} threads={options['threads']} "
+            f"sales={counts['sales']} locked_errors={counts['locked']} "
+            f"throughput={counts['sales'] / elapsed:.1f} sales/s"
+        )
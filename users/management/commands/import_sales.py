@@ -0,0 +1,34 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.imports import IMPORT_BATCH_SIZE, import_sales, write_rejects
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports sales from a CSV file with the columns product (id or name), quantity, "
+        "selling_price, customer_details, mode_of_payment and an optional sale_date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file", help="CSV file of sales to import.")
+        parser.add_argument("--rejects", default=None,
+                            help="Where to write rows that failed validation (default: <csv_file>.rejects.csv).")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                            help="Sales inserted per INSERT statement.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["csv_file"], newline="", encoding="utf-8-sig") as source:
+                imported, rejects = import_sales(csv.DictReader(source), batch_size=options["batch_size"])
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['csv_file']}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} sales."))
+
+        if rejects:
+            rejects_path = options["rejects"] or f"{options['csv_file']}.rejects.csv"
+            with open(rejects_path, "w", newline="", encoding="utf-8") as target:
+                write_rejects(rejects, csv.writer(target))
+            self.stdout.write(self.style.WARNING(f"Rejected {len(rejects)} rows, written to {rejects_path}."))
@@ -0,0 +1,127 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.db.models import Max, Sum
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from users.middleware import percentile
+from users.models import User, Products, Sale
+
+
+def _cashier(worker, user_id, product_ids, quantity, seconds, seed):
+    """ One cashier: posts sales through record_sale until the time is up. """
+    rng = random.Random(seed + worker)
+    client = Client()
+    client.force_login(User.objects.get(pk=user_id))
+    url = reverse("record_sale")
+
+    stats = {"latencies": [], "sold": 0, "rejected": 0, "locked": 0, "errors": 0}
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = client.post(url, {
+                    "product": rng.choice(product_ids),
+                    "quantity": quantity,
+                    "selling_price": "10.00",
+                    "mode_of_payment": "cash",
+                    "customer_details": f"loadtest {worker}",
+                })
+            except OperationalError:
+                stats["locked"] += 1
+                continue
+            except Exception:
+                stats["errors"] += 1
+                continue
+            stats["latencies"].append((time.perf_counter() - started) * 1000)
+            # record_sale redirects on success and re-renders the form otherwise
+            stats["sold" if response.status_code == 302 else "rejected"] += 1
+    finally:
+        connections.close_all()
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates concurrent cashiers posting to record_sale and reports throughput, "
+        "latency, lock errors and whether stock still adds up. Run it against a copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent cashiers.")
+        parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--products", type=int, nargs="*", default=None,
+                            help="Product ids to sell (default: the --top best sellers).")
+        parser.add_argument("--top", type=int, default=3)
+        parser.add_argument("--quantity", type=int, default=1, help="Units per sale.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        product_ids = options["products"] or list(
+            Sale.objects.values("product_id").annotate(sold=Sum("quantity"))
+            .order_by("-sold").values_list("product_id", flat=True)[:options["top"]]
+        ) or list(Products.objects.order_by("-stock").values_list("id", flat=True)[:options["top"]])
+        if not product_ids:
+            raise CommandError("No products to sell; seed some data first.")
+
+        user, _ = User.objects.get_or_create(username="loadtest_checkout", defaults={"role": User.SHOPKEEPER})
+        initial_stock = dict(Products.objects.filter(pk__in=product_ids).values_list("id", "stock"))
+        last_sale_id = Sale.objects.aggregate(last=Max("id"))["last"] or 0
+
+        setup_test_environment()  # Lets the test client through ALLOWED_HOSTS
+        connections.close_all()  # Nothing shared with forked workers
+        if options["mode"] == "process":
+            # Forked workers inherit the configured Django and test environment
+            pool = ProcessPoolExecutor(max_workers=options["workers"], mp_context=multiprocessing.get_context("fork"))
+        else:
+            pool = ThreadPoolExecutor(max_workers=options["workers"])
+        started = time.perf_counter()
+        with pool as executor:
+            futures = [
+                executor.submit(_cashier, worker, user.pk, product_ids, options["quantity"],
+                                options["seconds"], options["seed"])
+                for worker in range(options["workers"])
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for result in results for latency in result["latencies"]]
+        totals = {key: sum(result[key] for result in results) for key in ("sold", "rejected", "locked", "errors")}
+
+        self.stdout.write(
+            f"{options['workers']} {options['mode']} workers, {elapsed:.1f} s, products {product_ids}"
+        )
+        self.stdout.write(
+            f"sales={totals['sold']} ({totals['sold'] / elapsed:.1f}/s) rejected={totals['rejected']} "
+            f"lock_errors={totals['locked']} other_errors={totals['errors']}"
+        )
+        if latencies:
+            self.stdout.write(
+                f"latency p50 {percentile(latencies, 0.50):.1f} ms  p95 {percentile(latencies, 0.95):.1f} ms  "
+                f"p99 {percentile(latencies, 0.99):.1f} ms  max {max(latencies):.1f} ms"
+            )
+
+        # initial stock - units sold during the run must equal the stock now
+        sold = dict(
+            Sale.objects.filter(id__gt=last_sale_id, product_id__in=product_ids)
+            .values("product_id").annotate(units=Sum("quantity")).values_list("product_id", "units")
+        )
+        current_stock = dict(Products.objects.filter(pk__in=product_ids).values_list("id", "stock"))
+        consistent = True
+        for product_id in product_ids:
+            expected = initial_stock[product_id] - sold.get(product_id, 0)
+            if expected != current_stock[product_id]:
+                consistent = False
+                self.stdout.write(self.style.ERROR(
+                    f"Product {product_id}: expected stock {expected}, found {current_stock[product_id]}"
+                ))
+        if consistent:
+            self.stdout.write(self.style.SUCCESS("Stock consistency check passed."))
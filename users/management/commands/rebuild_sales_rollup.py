@@ -0,0 +1,75 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum, F, ExpressionWrapper, DecimalField
+from django.db.models.functions import TruncDate
+
+from users.models import Sale, DailyProductSales, ArchivedDailySales
+from users.report_cache import invalidate_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the DailyProductSales rollup table from the raw Sale rows, plus the "
+        "ArchivedDailySales summary for days moved to the archive database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rollup rows inserted per INSERT statement.")
+
+    def handle(self, *args, **options):
+        money = DecimalField(max_digits=12, decimal_places=2)
+        totals = (
+            Sale.objects
+            .annotate(day=TruncDate("sale_date"))
+            .values("day", "product_id")
+            .annotate(
+                total_quantity=Sum("quantity"),
+                total_revenue=Sum(ExpressionWrapper(F("quantity") * F("selling_price"), output_field=money)),
+                total_cost=Sum(ExpressionWrapper(F("quantity") * F("unit_cost"), output_field=money)),
+            )
+            .order_by()
+        )
+        archived = (
+            ArchivedDailySales.objects
+            .values("product_id", day=F("date"))
+            .annotate(
+                total_quantity=Sum("quantity"),
+                total_revenue=Sum("revenue"),
+                total_cost=Sum("cost"),
+            )
+            .order_by()
+        )
+
+        with transaction.atomic():
+            # Backdated imports can put hot sales on an archived day, so the
+            # two sources are summed per (day, product) before inserting
+            merged = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+            for row in chain(archived.iterator(), totals.iterator()):
+                entry = merged[(row["day"], row["product_id"])]
+                entry[0] += row["total_quantity"]
+                entry[1] += row["total_revenue"]
+                entry[2] += row["total_cost"]
+
+            DailyProductSales.objects.all().delete()
+            rows = DailyProductSales.objects.bulk_create(
+                (
+                    DailyProductSales(
+                        date=day,
+                        product_id=product_id,
+                        quantity=quantity,
+                        revenue=revenue,
+                        cost=cost,
+                        profit=revenue - cost,
+                    )
+                    for (day, product_id), (quantity, revenue, cost) in merged.items()
+                ),
+                batch_size=options["batch_size"],
+            )
+        invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} daily product sales rows."))
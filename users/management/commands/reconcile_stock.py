@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum, Subquery, OuterRef, Value
+from django.db.models.functions import Coalesce
+
+from users.models import Products, StockMovement
+
+
+class Command(BaseCommand):
+    help = "Checks that every product's stock equals the sum of its StockMovement ledger."
+
+    def handle(self, *args, **options):
+        ledger = (
+            StockMovement.objects.filter(product=OuterRef("pk"))
+            .values("product").annotate(total=Sum("quantity")).values("total")
+        )
+        products = (
+            Products.objects
+            .annotate(ledger_stock=Coalesce(Subquery(ledger), Value(0)))
+            .values_list("id", "name", "stock", "ledger_stock")
+            .order_by("id")
+        )
+
+        drifted = 0
+        checked = 0
+        for product_id, name, stock, ledger_stock in products.iterator():
+            checked += 1
+            if stock != ledger_stock:
+                drifted += 1
+                self.stdout.write(
+                    f"Product {product_id} ({name}): stock {stock}, ledger {ledger_stock} "
+                    f"({stock - ledger_stock:+})"
+                )
+
+        if drifted:
+            raise CommandError(f"{drifted} of {checked} products do not match their stock ledger.")
+        self.stdout.write(self.style.SUCCESS(f"All {checked} products match their stock ledger."))
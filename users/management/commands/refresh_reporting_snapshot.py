@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.reporting import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the main database into the read-only reporting snapshot with SQLite's "
+        "online backup API. With --every it keeps refreshing, e.g. as a sidecar process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--every", type=int, default=None, metavar="SECONDS",
+                            help="Refresh repeatedly, waiting this many seconds between copies.")
+        parser.add_argument("--pages", type=int, default=None,
+                            help="Pages copied per backup step (default: all at once in WAL mode, else 1024).")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            as_of = refresh_snapshot(pages=options["pages"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Reporting snapshot as of {as_of:%Y-%m-%d %H:%M:%S} UTC "
+                f"({time.monotonic() - started:.2f} s)."
+            ))
+            if options["every"] is None:
+                break
+            time.sleep(options["every"])
@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+from django.utils.timezone import now
+
+from users.jobs import run_job, prune_jobs
+from users.models import Job
+
+
+# Seconds between two sweeps for stale and expired jobs
+HOUSEKEEPING_EVERY = 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (report and transaction exports) on a pool of "
+        "threads, polling the Job table. Runs until stopped unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=settings.JOB_WORKER_THREADS,
+                            help="Jobs run at the same time.")
+        parser.add_argument("--poll", type=float, default=1.0, metavar="SECONDS",
+                            help="How long to wait before checking an empty queue again.")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once the queue is empty instead of waiting for new jobs.")
+
+    def _finished(self, job):
+        def report(future):
+            error = future.exception()
+            if error is not None:
+                self.stderr.write(f"Job #{job.pk} could not record its outcome: {error}")
+            else:
+                self.stdout.write(f"Job #{job.pk} {future.result()}.")
+        return report
+
+    def _housekeeping(self):
+        stale = Job.objects.fail_stale(now() - timedelta(seconds=settings.JOB_STALE_AFTER))
+        pruned = prune_jobs(now() - timedelta(days=settings.JOB_KEEP_DAYS))
+        if stale or pruned:
+            self.stdout.write(f"Failed {stale} stale job(s), pruned {pruned} old job(s).")
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        if threads < 1:
+            raise CommandError("--threads must be at least 1.")
+
+        running = set()
+        next_housekeeping = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job") as pool:
+            try:
+                while True:
+                    if time.monotonic() >= next_housekeeping:
+                        self._housekeeping()
+                        next_housekeeping = time.monotonic() + HOUSEKEEPING_EVERY
+
+                    running = {future for future in running if not future.done()}
+                    try:
+                        job = Job.objects.claim() if len(running) < threads else None
+                    except OperationalError as error:  # e.g. the database stayed locked; try again later
+                        self.stderr.write(f"Could not claim a job: {error}")
+                        time.sleep(options["poll"])
+                        continue
+                    if job is not None:
+                        self.stdout.write(f"Running job #{job.pk} ({job.get_kind_display()}).")
+                        future = pool.submit(run_job, job)
+                        future.add_done_callback(self._finished(job))
+                        running.add(future)
+                        continue
+
+                    if options["once"] and not running:
+                        break
+                    time.sleep(options["poll"])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping; waiting for the running jobs to finish.")
@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import make_aware, now
+
+from users.models import User, Products, Customer, Sale, StockMovement
+
+
+PAYMENT_MODES = ["cash", "card", "mobile money", "bank transfer"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds deterministic synthetic products, users and sales with bulk inserts. "
+        "The same --seed and --end-date always produce the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--sales", type=int, default=100_000)
+        parser.add_argument("--years", type=int, default=3, help="How far back the sales go.")
+        parser.add_argument("--end-date", default=None, help="Last sale day, YYYY-MM-DD (default: today).")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        end_day = (
+            datetime.strptime(options["end_date"], "%Y-%m-%d").date()
+            if options["end_date"] else now().date()
+        )
+        first_day = end_day - timedelta(days=365 * options["years"])
+        span_seconds = int((end_day - first_day).total_seconds()) + 86400
+        start = make_aware(datetime.combine(first_day, time.min))
+        batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            password = make_password("synthetic")
+            User.objects.bulk_create(
+                [
+                    User(username=f"synthetic_{i:04d}", password=password,
+                         role=User.SHOPKEEPER if i else User.ADMIN)
+                    for i in range(options["users"])
+                ],
+                ignore_conflicts=True,
+            )
+
+            products = Products.objects.bulk_create(
+                [
+                    Products(
+                        name=f"Synthetic Fragrance {i:05d}",
+                        cost_price=(cost := Decimal(rng.randint(500, 8000)) / 100),
+                        price=(cost * Decimal("1.6")).quantize(Decimal("0.01")),
+                        description=f"Synthetic product {i} for benchmarks.",
+                        stock=0,
+                    )
+                    for i in range(options["products"])
+                ],
+                batch_size=batch_size,
+            )
+            # Skew demand so a few products sell far more than the rest
+            weights = [1 / (rank + 1) for rank in range(len(products))]
+            customers = Customer.objects.resolve(f"Customer {number:04d}" for number in range(1, 5001))
+            sold = {product.pk: 0 for product in products}
+
+            def sales():
+                for _ in range(options["sales"]):
+                    product = rng.choices(products, weights)[0]
+                    quantity = rng.randint(1, 4)
+                    customer = f"Customer {rng.randint(1, 5000):04d}"
+                    sold[product.pk] += quantity
+                    yield Sale(
+                        product_id=product.pk,
+                        quantity=quantity,
+                        selling_price=product.price,
+                        unit_cost=product.cost_price,
+                        customer=customers[customer],
+                        customer_details=customer,
+                        mode_of_payment=rng.choice(PAYMENT_MODES),
+                        sale_date=start + timedelta(seconds=rng.randrange(span_seconds)),
+                    )
+
+            rows = sales()
+            while batch := list(islice(rows, batch_size)):
+                Sale.objects.bulk_create(batch)
+
+            # Leave every product with stock to spare after its recorded sales
+            for product in products:
+                product.stock = sold[product.pk] + rng.randint(0, 500)
+            Products.objects.bulk_update(products, ["stock"], batch_size=batch_size)
+            # bulk_update bypasses Products.save, so write the matching ledger rows here
+            StockMovement.objects.bulk_create(
+                [
+                    movement
+                    for product in products
+                    for movement in (
+                        StockMovement(product_id=product.pk, kind=StockMovement.RESTOCK,
+                                      quantity=product.stock + sold[product.pk], occurred_at=start),
+                        StockMovement(product_id=product.pk, kind=StockMovement.SALE,
+                                      quantity=-sold[product.pk], note="seeded sales"),
+                    )
+                    if movement.quantity
+                ],
+                batch_size=batch_size,
+            )
+
+        call_command("rebuild_sales_rollup", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(products)} products, {options['users']} users and {options['sales']} sales "
+            f"between {first_day} and {end_day}."
+        ))
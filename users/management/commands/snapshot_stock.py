@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from users.models import Products, StockMovement, StockSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Records every product's current stock as a StockSnapshot, so point-in-time "
+        "stock only replays the movements since. Run it periodically, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Snapshots inserted per INSERT statement.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Stock and the newest movement are read in one transaction, so they agree
+            last_movement_id = StockMovement.objects.aggregate(last=Max("id"))["last"] or 0
+            snapshots = StockSnapshot.objects.bulk_create(
+                (
+                    StockSnapshot(product_id=product_id, stock=stock, last_movement_id=last_movement_id)
+                    for product_id, stock in Products.objects.values_list("id", "stock").iterator()
+                ),
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded {len(snapshots)} stock snapshots."))
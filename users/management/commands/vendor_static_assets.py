@@ -0,0 +1,61 @@
+import base64
+import hashlib
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+VENDOR_DIR = Path(__file__).resolve().parents[2] / "static" / "vendor"
+
+BOOTSTRAP_VERSION = "5.3.0"
+BOOTSTRAP_CDN = f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist"
+# Versioned, because jazzmin ships Bootstrap 4 at vendor/bootstrap/ and its app comes first
+BOOTSTRAP_DIR = f"bootstrap-{BOOTSTRAP_VERSION}"
+
+# Vendored file -> (source URL, published SRI hash, or None for source maps)
+ASSETS = {
+    f"{BOOTSTRAP_DIR}/css/bootstrap.min.css": (
+        f"{BOOTSTRAP_CDN}/css/bootstrap.min.css",
+        "sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM",
+    ),
+    f"{BOOTSTRAP_DIR}/css/bootstrap.min.css.map": (f"{BOOTSTRAP_CDN}/css/bootstrap.min.css.map", None),
+    # No template uses the Popper-backed components, so the plain build is enough
+    f"{BOOTSTRAP_DIR}/js/bootstrap.min.js": (
+        f"{BOOTSTRAP_CDN}/js/bootstrap.min.js",
+        "sha384-fbbOQedDUMZZ5KreZpsbe1LCZPVmfTnH7ois6mU1QK+m14rQ1l2bGBq41eYeM/fS",
+    ),
+    f"{BOOTSTRAP_DIR}/js/bootstrap.min.js.map": (f"{BOOTSTRAP_CDN}/js/bootstrap.min.js.map", None),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-downloads the pinned third-party CSS/JS committed under users/static/vendor, "
+        "checking each file against its published integrity hash. Use it when bumping "
+        "a pinned version."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-download files that already exist.")
+
+    def handle(self, *args, **options):
+        for name, (url, integrity) in ASSETS.items():
+            target = VENDOR_DIR / name
+            if target.exists() and not options["force"]:
+                self.stdout.write(f"Kept {name}")
+                continue
+
+            with urlopen(url, timeout=30) as response:
+                content = response.read()
+            if integrity:
+                algorithm, expected = integrity.split("-", 1)
+                actual = base64.b64encode(hashlib.new(algorithm, content).digest()).decode()
+                if actual != expected:
+                    raise CommandError(f"{name} does not match its pinned {algorithm} hash.")
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            self.stdout.write(f"Fetched {name} ({len(content)} bytes)")
+
+        self.stdout.write(self.style.SUCCESS(f"Vendored assets are in {VENDOR_DIR}."))
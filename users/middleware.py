@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("users.performance")
+
+_samples = defaultdict(lambda: deque(maxlen=settings.PERF_WINDOW))
+_duplicates = defaultdict(Counter)
+_lock = threading.Lock()
+
+# Distinct repeated queries remembered per view, and per request before trimming
+DUPLICATES_KEPT = 20
+REQUEST_SIGNATURES_KEPT = 500
+
+
+def _trim(counter, keep):
+    """ Cuts a Counter down to its `keep` most common entries, in place. """
+    if len(counter) > keep:
+        kept = counter.most_common(keep)
+        counter.clear()
+        counter.update(dict(kept))
+
+
+def percentile(values, fraction):
+    """ The value `fraction` of the way through `values` once sorted (nearest rank). """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def performance_summary():
+    """
+    Rolling per-view statistics over the last PERF_WINDOW requests of this
+    worker process, slowest views first.
+    """
+    with _lock:
+        snapshot = {view: list(samples) for view, samples in _samples.items()}
+        duplicates = {view: counter.most_common(3) for view, counter in _duplicates.items()}
+
+    summary = []
+    for view, samples in snapshot.items():
+        wall = [sample[0] for sample in samples]
+        sql = [sample[1] for sample in samples]
+        queries = [sample[2] for sample in samples]
+        summary.append({
+            "view": view,
+            "requests": len(samples),
+            "wall_p50": percentile(wall, 0.50),
+            "wall_p95": percentile(wall, 0.95),
+            "wall_p99": percentile(wall, 0.99),
+            "sql_p50": percentile(sql, 0.50),
+            "sql_p95": percentile(sql, 0.95),
+            "queries_p50": percentile(queries, 0.50),
+            "queries_max": max(queries),
+            "duplicates": duplicates.get(view, []),
+        })
+    return sorted(summary, key=lambda row: row["wall_p95"], reverse=True)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, SQL time, repeated queries and wall time per view,
+    over every database alias (default, archive and reporting).
+
+    Each response gets a Server-Timing header, requests over PERF_SLOW_REQUEST_MS
+    or PERF_MAX_QUERIES are logged, and rolling percentiles are shown on the
+    staff performance page. SQL run while a streaming response is consumed
+    happens after the view returns and is not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Running totals rather than a list of every query, so a request
+        # issuing thousands of them stays small
+        totals = {"queries": 0, "seconds": 0.0}
+        # SQL arrives with %s placeholders, so the text is the query's signature
+        signatures = Counter()
+
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                totals["queries"] += 1
+                totals["seconds"] += time.perf_counter() - started
+                signatures[sql] += 1
+                if len(signatures) > 2 * REQUEST_SIGNATURES_KEPT:
+                    _trim(signatures, REQUEST_SIGNATURES_KEPT)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(record))
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        query_count = totals["queries"]
+        sql_ms = totals["seconds"] * 1000
+        repeated = {sql: count for sql, count in signatures.most_common(DUPLICATES_KEPT) if count > 1}
+
+        with _lock:
+            _samples[view].append((wall_ms, sql_ms, query_count))
+            _duplicates[view].update(repeated)
+            _trim(_duplicates[view], DUPLICATES_KEPT)
+
+        response["Server-Timing"] = (
+            f'db;dur={sql_ms:.1f};desc="{query_count} queries", app;dur={wall_ms:.1f}'
+        )
+
+        if wall_ms > settings.PERF_SLOW_REQUEST_MS or query_count > settings.PERF_MAX_QUERIES:
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms SQL, repeated: %s",
+                request.method, request.path, view, wall_ms, query_count, sql_ms,
+                "; ".join(f"{count}x {sql[:120]}" for sql, count in repeated.items()) or "none",
+            )
+
+        return response
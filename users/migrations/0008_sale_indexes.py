@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_sale_mode_of_payment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['sale_date'], name='users_sale_sale_da_e174ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['product', 'sale_date'], name='users_sale_product_e56f6d_idx'),
+        ),
+    ]
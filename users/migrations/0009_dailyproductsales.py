@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum, ExpressionWrapper, DecimalField
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    """ Sums the sales recorded so far into their (day, product) rows. """
+    Sale = apps.get_model('users', 'Sale')
+    DailyProductSales = apps.get_model('users', 'DailyProductSales')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    totals = (
+        Sale.objects
+        .annotate(day=TruncDate('sale_date'))
+        .values('day', 'product_id')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(ExpressionWrapper(F('quantity') * F('selling_price'), output_field=money)),
+            # Sales do not keep their own cost yet; it is the product's current one
+            total_cost=Sum(ExpressionWrapper(F('quantity') * F('product__cost_price'), output_field=money)),
+        )
+        .order_by()
+    )
+    DailyProductSales.objects.bulk_create(
+        (
+            DailyProductSales(
+                date=row['day'], product_id=row['product_id'], quantity=row['total_quantity'],
+                revenue=row['total_revenue'], cost=row['total_cost'],
+                profit=row['total_revenue'] - row['total_cost'],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_sale_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.products')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='unique_daily_product_sales')],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_unit_cost(apps, schema_editor):
+    Products = apps.get_model('users', 'Products')
+    Sale = apps.get_model('users', 'Sale')
+    Sale.objects.update(unit_cost=Subquery(
+        Products.objects.filter(pk=OuterRef('product_id')).values('cost_price')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_sale_date_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.RunPython(backfill_unit_cost, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='sale',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8),
+        ),
+    ]
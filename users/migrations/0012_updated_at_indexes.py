@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_sale_unit_cost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['updated_at'], name='users_produ_updated_c6e35b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['updated_at'], name='users_sale_updated_93b2a1_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+import re
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+PHONE_PATTERN = re.compile(r"\+?[\d\s\-().]{7,20}")
+
+
+def link_customers(apps, schema_editor):
+    """ Creates one Customer per normalized customer_details string and links every sale to it. """
+    Customer = apps.get_model('users', 'Customer')
+    Sale = apps.get_model('users', 'Sale')
+
+    customers = {}
+    sale_ids = defaultdict(list)
+    for sale_id, details in Sale.objects.values_list('id', 'customer_details').iterator(chunk_size=2000):
+        name = " ".join(details.split())
+        key = name.casefold()
+        if key not in customers:
+            phone = re.sub(r"[^\d+]", "", name) if PHONE_PATTERN.fullmatch(name) else ""
+            customers[key] = Customer(name=name, phone=phone, search_key=key)
+        sale_ids[key].append(sale_id)
+
+    Customer.objects.bulk_create(customers.values(), batch_size=500)
+    for key, ids in sale_ids.items():
+        customer_id = customers[key].pk
+        for start in range(0, len(ids), 500):
+            Sale.objects.filter(id__in=ids[start:start + 500]).update(customer_id=customer_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=70)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('search_key', models.CharField(max_length=70, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='customer',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='users.customer'),
+        ),
+        migrations.RunPython(link_customers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['customer', 'sale_date'], name='users_sale_custome_9ac5c4_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """ Gives every existing product an opening movement equal to its current stock. """
+    Products = apps.get_model('users', 'Products')
+    StockMovement = apps.get_model('users', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(product_id=product_id, kind='adjustment', quantity=stock, note='opening balance')
+            for product_id, stock in Products.objects.exclude(stock=0).values_list('id', 'stock').iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_customer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sale', 'Sale'), ('restock', 'Restock'), ('adjustment', 'Adjustment')], max_length=15)),
+                ('quantity', models.IntegerField()),
+                ('note', models.CharField(blank=True, max_length=100)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.products')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'occurred_at'], name='users_stock_product_607460_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('last_movement_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.products')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'taken_at'], name='users_stock_product_27c181_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-17 18:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('product_id', models.BigIntegerField()),
+                ('product_name', models.CharField(max_length=100)),
+                ('quantity', models.PositiveIntegerField()),
+                ('selling_price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('customer_id', models.BigIntegerField(blank=True, null=True)),
+                ('customer_details', models.CharField(max_length=70)),
+                ('mode_of_payment', models.CharField(max_length=20)),
+                ('sale_date', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sale_date'], name='users_archi_sale_da_216ddf_idx'), models.Index(fields=['product_id', 'sale_date'], name='users_archi_product_ec8e7a_idx'), models.Index(fields=['customer_id', 'sale_date'], name='users_archi_custome_539f14_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('mode_of_payment', models.CharField(max_length=20)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.products')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'mode_of_payment'), name='unique_archived_daily_sales')],
+            },
+        ),
+    ]
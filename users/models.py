@@ -1,5 +1,14 @@
-from django.db import models
+import re
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.contrib.auth.models import AbstractUser 
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.timezone import now, localdate
+
+from .signals import sales_bulk_recorded
 # Create your models here.
 
 class User(AbstractUser):
@@ -26,6 +35,56 @@ class User(AbstractUser):
         return f"{self.username} - {self.role}"
     
     
+class ProductsQuerySet(models.QuerySet):
+
+    def decrement_stock(self, product_id, quantity, note=""):
+        """Atomically takes `quantity` units off a product's stock.
+
+        Runs a single conditional UPDATE, so concurrent sales can neither
+        oversell nor overwrite each other, and logs the sale in the stock
+        ledger in the same transaction. Returns False when the product does
+        not have enough stock left.
+        """
+        with transaction.atomic(savepoint=False):
+            updated = (
+                self.filter(pk=product_id, stock__gte=quantity)
+                .update(stock=F('stock') - quantity, updated_at=now())
+            )
+            if updated:
+                StockMovement.objects.create(
+                    product_id=product_id, kind=StockMovement.SALE, quantity=-quantity, note=note,
+                )
+        return updated == 1
+
+    def adjust_stock(self, amount, note=""):
+        """
+        Adds `amount` (negative to remove) to the stock of every product in
+        the queryset with one UPDATE, plus one INSERT of matching ledger rows.
+        Products that would go below zero are skipped. Returns how many
+        products were adjusted.
+        """
+        if not amount:
+            return 0
+        with transaction.atomic():
+            # The stock guard sits in the UPDATE itself, so a sale landing
+            # meanwhile cannot push stock below zero. Every changed row gets
+            # the same updated_at, which tells them apart for the ledger.
+            stamp = now()
+            candidates = list(self.filter(stock__gte=max(-amount, 0)).values_list('pk', flat=True))
+            adjusted = Products.objects.filter(pk__in=candidates)
+            if not adjusted.filter(stock__gte=max(-amount, 0)).update(stock=F('stock') + amount, updated_at=stamp):
+                return 0
+            product_ids = list(adjusted.filter(updated_at=stamp).values_list('pk', flat=True))
+            StockMovement.objects.bulk_create(
+                StockMovement(
+                    product_id=product_id, quantity=amount, note=note,
+                    kind=StockMovement.RESTOCK if amount > 0 else StockMovement.ADJUSTMENT,
+                )
+                for product_id in product_ids
+            )
+        return len(product_ids)
+
+
 class Products(models.Model):
     name = models.CharField(max_length=100)
     cost_price = models.DecimalField(max_digits=8, decimal_places=2)
@@ -34,7 +93,42 @@ class Products(models.Model):
     stock = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProductsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),  # max(updated_at) for API conditional GETs
+        ]
     
+    def save(self, *args, **kwargs):
+        # Any direct change to stock (new product, edit, admin) goes into the ledger
+        with transaction.atomic():
+            previous = 0
+            if not self._state.adding:
+                previous = Products.objects.filter(pk=self.pk).values_list('stock', flat=True).first() or 0
+            super().save(*args, **kwargs)
+
+            change = self.stock - previous
+            if change:
+                StockMovement.objects.create(
+                    product=self, quantity=change,
+                    kind=StockMovement.RESTOCK if change > 0 else StockMovement.ADJUSTMENT,
+                )
+
+    def stock_at(self, when):
+        """
+        Stock level at a past moment: the nearest snapshot taken at or before
+        `when`, plus the ledger movements between that snapshot and `when`.
+        """
+        snapshot = self.stocksnapshot_set.filter(taken_at__lte=when).order_by('-taken_at').first()
+        movements = self.stockmovement_set.filter(occurred_at__lte=when)
+        if snapshot:
+            # Seeks the (product, id) index past the snapshot, so only newer movements are read
+            movements = movements.filter(id__gt=snapshot.last_movement_id)
+        change = movements.aggregate(total=Sum('quantity'))['total'] or 0
+        return (snapshot.stock if snapshot else 0) + change
+
     def profit_per_unit(self):
         """Calculates the profit per unit sold"""
         return self.price - self.cost_price
@@ -42,23 +136,170 @@ class Products(models.Model):
     def __str__(self):
         return self.name
 
+PHONE_PATTERN = re.compile(r"\+?[\d\s\-().]{7,20}")
+
+
+class CustomerQuerySet(models.QuerySet):
+
+    @staticmethod
+    def normalize(details):
+        """Collapses whitespace and case so spellings of one customer share a key."""
+        return " ".join(details.split()).casefold()
+
+    def resolve(self, details):
+        """
+        Maps free-text customer details to Customer rows, creating missing ones.
+
+        Takes an iterable of strings and returns {details: Customer}. Costs one
+        lookup per 500 distinct customers, plus a bulk INSERT when some are new.
+        """
+        keys = {text: self.normalize(text) for text in set(details)}
+        found = self._by_key(set(keys.values()))
+
+        missing = {}
+        for text, key in keys.items():
+            if key not in found and key not in missing:
+                name = " ".join(text.split())
+                phone = re.sub(r"[^\d+]", "", name) if PHONE_PATTERN.fullmatch(name) else ""
+                missing[key] = Customer(name=name, phone=phone, search_key=key)
+        if missing:
+            # A concurrent checkout may insert the same customer; fetch the winners back
+            self.bulk_create(missing.values(), batch_size=500, ignore_conflicts=True)
+            found.update(self._by_key(list(missing)))
+
+        return {text: found[key] for text, key in keys.items()}
+
+    def _by_key(self, keys):
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 500):  # Stay under SQLite's bound-parameter limit
+            found.update((customer.search_key, customer) for customer in self.filter(search_key__in=keys[start:start + 500]))
+        return found
+
+    def prefix_search(self, prefix):
+        """Customers whose normalized name starts with `prefix`, as an index range scan."""
+        key = self.normalize(prefix)
+        # A plain range on the indexed key works on every backend, unlike LIKE 'x%'
+        return self.filter(search_key__gte=key, search_key__lt=key + "\U0010ffff")
+
+
+class Customer(models.Model):
+    name = models.CharField(max_length=70)
+    phone = models.CharField(max_length=20, blank=True)
+    search_key = models.CharField(max_length=70, unique=True)  # Normalized name, see CustomerQuerySet.normalize
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CustomerQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+
+class SaleQuerySet(models.QuerySet):
+
+    def record_basket(self, lines, customer_details, mode_of_payment):
+        """
+        Records a multi-item basket as one atomic checkout.
+
+        `lines` is a list of (product, quantity, selling_price). The involved
+        products are fetched and locked in one query, each product's stock is
+        taken with a single conditional UPDATE, and all sales are written with
+        one bulk INSERT. Raises ValueError, recording nothing, when any
+        product is short of stock.
+        """
+        wanted = defaultdict(int)
+        revenue = defaultdict(int)
+        for product, quantity, selling_price in lines:
+            wanted[product.pk] += quantity
+            revenue[product.pk] += quantity * selling_price
+
+        with transaction.atomic():
+            customer = Customer.objects.resolve([customer_details])[customer_details]
+            products = Products.objects.select_for_update().only('name', 'cost_price', 'stock').in_bulk(wanted)
+            for product_id, quantity in wanted.items():
+                product = products.get(product_id)
+                if product is None or product.stock < quantity:
+                    raise ValueError(f"Not enough stock for {product or 'a removed product'}")
+                if not Products.objects.decrement_stock(product_id, quantity, note="basket"):
+                    raise ValueError(f"Not enough stock for {product}")
+
+            sale_date = now()
+            sales = self.bulk_create([
+                Sale(
+                    product=products[product.pk], quantity=quantity, selling_price=selling_price,
+                    unit_cost=products[product.pk].cost_price,
+                    customer=customer, customer_details=customer_details,
+                    mode_of_payment=mode_of_payment, sale_date=sale_date,
+                )
+                for product, quantity, selling_price in lines
+            ])
+            for product_id, quantity in wanted.items():
+                DailyProductSales.objects.add(
+                    localdate(sale_date), product_id, quantity,
+                    revenue[product_id], quantity * products[product_id].cost_price,
+                )
+            sales_bulk_recorded.send(sender=Sale, days={localdate(sale_date)})
+
+        return sales
+
+
 class Sale(models.Model):
     product = models.ForeignKey(Products, on_delete=models.CASCADE) 
     quantity = models.PositiveIntegerField()  
     selling_price = models.DecimalField(max_digits=8, decimal_places=2)  # New Field
+    unit_cost = models.DecimalField(max_digits=8, decimal_places=2, blank=True)  # Product cost at sale time
     customer_details = models.CharField(max_length=70)
+    # Indexed through the (customer, sale_date) index below
+    customer = models.ForeignKey(Customer, null=True, blank=True, on_delete=models.SET_NULL, db_index=False)
     mode_of_payment = models.CharField(max_length=20)
-    sale_date = models.DateTimeField(auto_now_add=True)
+    sale_date = models.DateTimeField(default=now)  # Backdated by bulk imports
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SaleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sale_date']),
+            models.Index(fields=['product', 'sale_date']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['customer', 'sale_date']),
+        ]
+
     def save(self, *args, **kwargs):
-        if self.product.stock >= self.quantity:
-            self.product.stock -= self.quantity  # Reduce stock
-            self.product.save()
+        # Left blank (new sales, or cleared on the admin form): the product's current cost
+        if self.unit_cost is None:
+            self.unit_cost = self.product.cost_price
+
+        if not self._state.adding:
+            return self._save_edit(*args, **kwargs)
+
+        # Stock is only taken when the sale is first recorded.
+        with transaction.atomic():
+            if self.customer_id is None and self.customer_details:
+                self.customer = Customer.objects.resolve([self.customer_details])[self.customer_details]
+            if not Products.objects.decrement_stock(self.product_id, self.quantity):
+                raise ValueError("Not enough stock available")
+            super().save(*args, **kwargs)
+            DailyProductSales.objects.record(self)
+
+    def _save_edit(self, *args, **kwargs):
+        """ Saves changes to a recorded sale, moving its figures in the rollup from the old values to the new ones. """
+        with transaction.atomic():
+            previous = Sale.objects.filter(pk=self.pk).only(
+                'product_id', 'quantity', 'selling_price', 'unit_cost', 'sale_date',
+            ).first()
             super().save(*args, **kwargs)
-        else:
-            raise ValueError("Not enough stock available")
+            if previous is None or previous._rollup_key() == self._rollup_key():
+                return
+            DailyProductSales.objects.unrecord(previous)
+            DailyProductSales.objects.record(self)
+            if localdate(previous.sale_date) != localdate(self.sale_date):
+                # post_save only names the new day; the old one lost the sale
+                sales_bulk_recorded.send(sender=Sale, days={localdate(previous.sale_date)})
+
+    def _rollup_key(self):
+        return (localdate(self.sale_date), self.product_id, self.quantity, self.selling_price, self.unit_cost)
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name} on {self.sale_date}"
@@ -68,5 +309,325 @@ class Sale(models.Model):
 
     @property
     def total_profit(self):
-        """Calculates profit dynamically (Revenue - Cost)"""
-        return self.quantity * (self.selling_price - self.product.cost_price)
+        """Calculates profit from the cost snapshotted at sale time (Revenue - Cost)"""
+        return self.quantity * (self.selling_price - self.unit_cost)
+
+
+
+class DailyProductSalesQuerySet(models.QuerySet):
+
+    def record(self, sale):
+        """Adds a freshly recorded sale to its (date, product) rollup row."""
+        self.add(
+            localdate(sale.sale_date), sale.product_id, sale.quantity,
+            sale.selling_price * sale.quantity, sale.unit_cost * sale.quantity,
+        )
+
+    def unrecord(self, sale):
+        """Takes an edited or deleted sale's old figures back out of its rollup row, dropping the row once empty."""
+        revenue = sale.selling_price * sale.quantity
+        cost = sale.unit_cost * sale.quantity
+        rows = self.filter(date=localdate(sale.sale_date), product_id=sale.product_id)
+        rows.update(
+            quantity=F('quantity') - sale.quantity,
+            revenue=F('revenue') - revenue,
+            cost=F('cost') - cost,
+            profit=F('profit') - (revenue - cost),
+        )
+        rows.filter(quantity=0).delete()
+
+    def add(self, day, product_id, quantity, revenue, cost):
+        """Adds already-summed sales figures to the (day, product) rollup row."""
+        increments = dict(
+            quantity=F('quantity') + quantity,
+            revenue=F('revenue') + revenue,
+            cost=F('cost') + cost,
+            profit=F('profit') + (revenue - cost),
+        )
+        if self.filter(date=day, product_id=product_id).update(**increments):
+            return
+
+        row, created = self.get_or_create(
+            date=day, product_id=product_id,
+            defaults=dict(quantity=quantity, revenue=revenue, cost=cost, profit=revenue - cost),
+        )
+        if not created:
+            # Another worker created the row between our UPDATE and INSERT
+            self.filter(pk=row.pk).update(**increments)
+
+
+class DailyProductSales(models.Model):
+    """
+    Per-day, per-product sales totals, kept in step with every recorded sale.
+
+    Reports sum these small rows instead of scanning Sale. Rebuild them from
+    scratch with `manage.py rebuild_sales_rollup`.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Products, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = DailyProductSalesQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='unique_daily_product_sales'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.date}: {self.quantity} sold"
+
+
+# Sent for every deleted sale, queryset deletes (the admin's bulk action) and
+# cascades included, inside the deleting transaction
+@receiver(post_delete, sender=Sale)
+def _sale_deleted(sender, instance, **kwargs):
+    DailyProductSales.objects.unrecord(instance)
+
+
+class ArchivedDailySalesQuerySet(models.QuerySet):
+
+    def add_totals(self, totals):
+        """
+        Adds freshly archived sales to the summary. `totals` maps
+        (day, product_id, mode_of_payment) to (quantity, revenue, cost).
+
+        Existing rows of the covered days are read once, then updated and
+        created in bulk. Only `manage.py archive_sales` writes here, so no
+        concurrent writer can race between the read and the writes.
+        """
+        if not totals:
+            return
+        days = [key[0] for key in totals]
+        existing = {
+            (row.date, row.product_id, row.mode_of_payment): row
+            for row in self.filter(date__gte=min(days), date__lte=max(days))
+        }
+
+        changed, created = [], []
+        for key, (quantity, revenue, cost) in totals.items():
+            row = existing.get(key)
+            if row is None:
+                created.append(ArchivedDailySales(
+                    date=key[0], product_id=key[1], mode_of_payment=key[2],
+                    quantity=quantity, revenue=revenue, cost=cost,
+                ))
+            else:
+                row.quantity += quantity
+                row.revenue += revenue
+                row.cost += cost
+                changed.append(row)
+
+        self.bulk_update(changed, ['quantity', 'revenue', 'cost'], batch_size=500)
+        self.bulk_create(created, batch_size=500)
+
+
+class ArchivedDailySales(models.Model):
+    """
+    Per-day, per-product, per-payment-mode totals of the sales moved to the
+    archive database. Lives in the hot database, so reports that need more
+    detail than DailyProductSales (payment modes) still cover archived days
+    without opening the archive.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Products, on_delete=models.CASCADE)
+    mode_of_payment = models.CharField(max_length=20)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = ArchivedDailySalesQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product', 'mode_of_payment'], name='unique_archived_daily_sales'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.date} by {self.mode_of_payment}: {self.quantity} sold"
+
+
+class ArchivedSale(models.Model):
+    """
+    A sale moved out of the hot database by `manage.py archive_sales`.
+
+    Stored in the 'archive' database (see users/routers.py), so it keeps the
+    product and customer as plain ids, plus the product name, instead of
+    foreign keys. The primary key is the original Sale id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    product_id = models.BigIntegerField()
+    product_name = models.CharField(max_length=100)
+    quantity = models.PositiveIntegerField()
+    selling_price = models.DecimalField(max_digits=8, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=8, decimal_places=2)
+    customer_id = models.BigIntegerField(null=True, blank=True)
+    customer_details = models.CharField(max_length=70)
+    mode_of_payment = models.CharField(max_length=20)
+    sale_date = models.DateTimeField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sale_date']),
+            models.Index(fields=['product_id', 'sale_date']),
+            models.Index(fields=['customer_id', 'sale_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name} on {self.sale_date}"
+
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of every stock change. The sum of a product's
+    movements always equals its current Products.stock.
+    """
+    SALE = 'sale'
+    RESTOCK = 'restock'
+    ADJUSTMENT = 'adjustment'
+
+    KIND_CHOICES = [
+        (SALE, 'Sale'),
+        (RESTOCK, 'Restock'),
+        (ADJUSTMENT, 'Adjustment'),
+    ]
+
+    product = models.ForeignKey(Products, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=15, choices=KIND_CHOICES)
+    quantity = models.IntegerField()  # Signed: negative takes stock out
+    note = models.CharField(max_length=100, blank=True)
+    occurred_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'occurred_at']),
+            models.Index(fields=['product', 'id']),  # Movements after a snapshot, see Products.stock_at
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity:+} x {self.product_id} at {self.occurred_at}"
+
+
+class StockSnapshot(models.Model):
+    """
+    A product's stock at a moment, so point-in-time lookups only replay the
+    movements after it. Written by `manage.py snapshot_stock`.
+    """
+    product = models.ForeignKey(Products, on_delete=models.CASCADE)
+    stock = models.IntegerField()
+    last_movement_id = models.BigIntegerField(default=0)  # Newest movement already counted in `stock`
+    taken_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'taken_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.stock} at {self.taken_at}"
+
+
+class JobQuerySet(models.QuerySet):
+
+    def claim(self):
+        """
+        Marks the oldest queued job as running and returns it, or None when
+        the queue is empty. The conditional UPDATE makes the claim safe with
+        several workers polling the same table.
+        """
+        for pk in self.filter(status=Job.QUEUED).order_by('created_at', 'id').values_list('pk', flat=True)[:10]:
+            if self.filter(pk=pk, status=Job.QUEUED).update(status=Job.RUNNING, started_at=now(), updated_at=now()):
+                return self.get(pk=pk)
+        return None
+
+    def fail_stale(self, before):
+        """ Fails running jobs that have not reported progress since `before`, as their worker is gone. """
+        return self.filter(status=Job.RUNNING, updated_at__lt=before).update(
+            status=Job.FAILED, error="The worker stopped before the job finished.", finished_at=now(),
+        )
+
+
+class Job(models.Model):
+    """
+    A report or export run in the background by `manage.py run_jobs`, so a
+    request only has to queue it. The finished CSV is kept under
+    JOB_RESULTS_DIR until it is downloaded or pruned.
+    """
+    SALES_REPORT = 'sales_report'
+    TRANSACTIONS = 'transactions'
+
+    KIND_CHOICES = [
+        (SALES_REPORT, 'Sales report export'),
+        (TRANSACTIONS, 'Transactions export'),
+    ]
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    processed = models.PositiveIntegerField(default=0)  # Rows written so far
+    total = models.PositiveIntegerField(null=True, blank=True)  # Rows expected, once known
+    cancel_requested = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    created_at = models.DateTimeField(default=now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=now)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+
+    def is_finished(self):
+        return self.status in self.FINISHED
+
+    def percent(self):
+        if self.status == self.SUCCEEDED:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.processed * 100 // self.total)
+
+    def report_progress(self, processed, total=None):
+        """
+        Saves how far the job got in a single UPDATE. Returns False instead
+        when someone asked to cancel it, so the worker can stop.
+        """
+        fields = {'processed': processed, 'updated_at': now()}
+        if total is not None:
+            fields['total'] = total
+        return bool(Job.objects.filter(pk=self.pk, cancel_requested=False).update(**fields))
+
+    def cancel(self):
+        """ Cancels a queued job at once; a running one stops at its next progress report. """
+        if Job.objects.filter(pk=self.pk, status=self.QUEUED).update(status=self.CANCELLED, finished_at=now()):
+            return
+        Job.objects.filter(pk=self.pk, status=self.RUNNING).update(cancel_requested=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
@@ -0,0 +1,81 @@
+import base64
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def encode_cursor(sale):
+    """ Packs a sale's (sale_date, id) position into an opaque cursor string. """
+    raw = f"{sale.sale_date.isoformat()}|{sale.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """ Unpacks a cursor into (sale_date, id). Returns None for anything malformed. """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sale_date, pk = raw.split("|")
+        return datetime.fromisoformat(sale_date), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def keyset_page(queryset, page_size, after=None, before=None):
+    """
+    Returns one page of sales, newest first, positioned by (sale_date, id).
+
+    `after` continues towards older sales and `before` walks back towards newer
+    ones. Both seek straight to the position through the sale_date index, so
+    deep pages cost the same as the first one, unlike OFFSET paging.
+    """
+    position = decode_cursor(after or before or "")
+    backwards = position is not None and not after
+
+    if position is None:
+        rows = queryset.order_by("-sale_date", "-id")
+    elif backwards:
+        sale_date, pk = position
+        rows = queryset.filter(
+            Q(sale_date__gt=sale_date) | Q(sale_date=sale_date, id__gt=pk)
+        ).order_by("sale_date", "id")
+    else:
+        sale_date, pk = position
+        rows = queryset.filter(
+            Q(sale_date__lt=sale_date) | Q(sale_date=sale_date, id__lt=pk)
+        ).order_by("-sale_date", "-id")
+
+    # One extra row tells us whether there is anything beyond this page
+    rows = list(rows[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, position is not None
+
+    return {
+        "object_list": rows,
+        "next_cursor": encode_cursor(rows[-1]) if rows and has_next else None,
+        "previous_cursor": encode_cursor(rows[0]) if rows and has_previous else None,
+    }
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips the exact COUNT(*) over a whole table.
+
+    Querysets are counted only up to `count_limit` rows, so a large table
+    pages through its first (newest) rows instead of being counted in full;
+    filters, such as the date hierarchy, then reach the rest. The highest
+    primary key is no estimate: once old sales are archived it far
+    overstates the rows left, and the pages beyond them would be empty.
+    """
+    count_limit = 10_000
+
+    @cached_property
+    def count(self):
+        return self.object_list.order_by()[:self.count_limit].count()
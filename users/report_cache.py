@@ -0,0 +1,139 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.timezone import localdate
+
+from .models import Products, Sale
+from .reporting import reading_snapshot, snapshot_refreshed_at
+from .reports import build_report
+from .signals import sales_bulk_recorded
+
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+ALL_VERSION_KEY = "reports:v:all"
+
+
+def _cache():
+    return caches[settings.REPORTS_CACHE_ALIAS]
+
+
+def _day_key(day):
+    return f"reports:v:day:{day.isoformat()}"
+
+
+def _month_key(day):
+    return f"reports:v:month:{day.year}-{day.month:02d}"
+
+
+def _version_keys(start, end):
+    """
+    Names the version counters a cached (start, end) period depends on.
+
+    A single day only depends on that day, so a sale today leaves yesterday's
+    daily report cached; longer periods depend on every month they touch.
+    """
+    if end - start == timedelta(days=1):
+        return [ALL_VERSION_KEY, _day_key(start)]
+
+    keys = [ALL_VERSION_KEY]
+    month = start.replace(day=1)
+    while month < end:
+        keys.append(_month_key(month))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return keys
+
+
+def cached_build_report(periods, group_by="product"):
+    """
+    Same as reports.build_report, but serves each period from the report cache.
+
+    Entries and the version counters they were built against are read in one
+    get_many; only stale or missing periods are recomputed, still in a single
+    query, and written back together. Reports read from the reporting snapshot
+    are also tied to that snapshot, so a refresh replaces them.
+    """
+    cache = _cache()
+    as_of = snapshot_refreshed_at() if reading_snapshot() else None
+    source = as_of.timestamp() if as_of else None
+    entry_keys = {name: f"reports:{group_by}:{start.isoformat()}:{end.isoformat()}" for name, (start, end) in periods.items()}
+    version_keys = {name: _version_keys(start, end) for name, (start, end) in periods.items()}
+    found = cache.get_many([*entry_keys.values(), *{key for keys in version_keys.values() for key in keys}])
+
+    report, missing, versions = {}, {}, {}
+    for name in periods:
+        versions[name] = (*(found.get(key, 0) for key in version_keys[name]), source)
+        entry = found.get(entry_keys[name])
+        if entry is not None and entry[0] == versions[name]:
+            report[name] = entry[1]
+        else:
+            missing[name] = periods[name]
+
+    with _stats_lock:
+        _stats["hits"] += len(periods) - len(missing)
+        _stats["misses"] += len(missing)
+
+    if missing:
+        computed = build_report(missing, group_by)
+        cache.set_many(
+            {entry_keys[name]: (versions[name], data) for name, data in computed.items()},
+            settings.REPORTS_CACHE_TIMEOUT,
+        )
+        report.update(computed)
+
+    return {name: report[name] for name in periods}
+
+
+def report_cache_stats():
+    """ Hit/miss counters of this worker process since it started. """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _bump(*keys):
+    cache = _cache()
+    for key in keys:
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); a fresh counter is just as good
+            cache.set(key, 1, None)
+
+
+def invalidate_days(days):
+    """ Marks cached reports covering any of `days` (and their months) as stale. """
+    keys = set()
+    for day in days:
+        keys.update((_day_key(day), _month_key(day)))
+    _bump(*keys)
+
+
+def invalidate_all():
+    _bump(ALL_VERSION_KEY)
+
+
+# Invalidation waits for the commit, so no reader can re-cache the old totals
+# under the new version while the write is still in flight.
+
+@receiver([post_save, post_delete], sender=Sale)
+def _sale_changed(sender, instance, **kwargs):
+    days = {localdate(instance.sale_date)}
+    transaction.on_commit(lambda: invalidate_days(days))
+
+
+@receiver(sales_bulk_recorded)
+def _sales_bulk_recorded(sender, days, **kwargs):
+    transaction.on_commit(lambda: invalidate_days(days))
+
+
+@receiver([post_save, post_delete], sender=Products)
+def _product_changed(sender, instance, **kwargs):
+    # Profit uses Sale.unit_cost, but product names label every product report
+    transaction.on_commit(invalidate_all)
@@ -0,0 +1,116 @@
+import contextvars
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+
+
+# Database alias of the read-only snapshot that reports and exports read from
+REPORTING_DB = 'reporting'
+
+# Set while a view wrapped in @snapshot_reads (or its streamed response) runs
+_snapshot_reads = contextvars.ContextVar('snapshot_reads', default=False)
+
+
+def snapshot_refreshed_at():
+    """ When the current reporting snapshot was taken, or None if there is none yet. """
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(settings.REPORTING_SNAPSHOT_PATH), tz=timezone.utc)
+    except OSError:
+        return None
+
+
+def reading_snapshot():
+    """ True while reads of reporting models go to the snapshot. """
+    return _snapshot_reads.get()
+
+
+@contextmanager
+def use_snapshot():
+    """
+    Sends reads of reporting models inside the block to the snapshot, for
+    work done outside a request, such as background jobs. Falls back to the
+    main database until the first snapshot exists.
+    """
+    token = _snapshot_reads.set(snapshot_refreshed_at() is not None)
+    try:
+        yield
+    finally:
+        _snapshot_reads.reset(token)
+
+
+def snapshot_reads(view):
+    """
+    Sends the view's reads of sales, products and rollups to the reporting
+    snapshot (see ReportingRouter), including those made while a streaming
+    response is being sent. Falls back to the main database until the first
+    snapshot exists.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if snapshot_refreshed_at() is None:
+            return view(request, *args, **kwargs)
+
+        token = _snapshot_reads.set(True)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _snapshot_reads.reset(token)
+        if response.streaming:
+            response.streaming_content = _on_snapshot(response.streaming_content)
+        return response
+
+    return wrapper
+
+
+def _on_snapshot(content):
+    # Only around each chunk: a generator shares its caller's context, so the
+    # flag must not stay set once the chunk is handed back
+    iterator = iter(content)
+    while True:
+        token = _snapshot_reads.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _snapshot_reads.reset(token)
+        yield chunk
+
+
+def refresh_snapshot(pages=None, sleep=0.05):
+    """
+    Copies the main database into the reporting snapshot with SQLite's online
+    backup API, then swaps it in with an atomic rename.
+
+    A WAL database is copied in one step, since its readers never block the
+    writer. In rollback-journal mode the copy goes `pages` pages at a time,
+    sleeping in between so a sale can take the write lock. Connections that
+    are still open keep reading the previous file until they reconnect.
+    Returns the time the copy started, which is the snapshot's "as of" time.
+    """
+    source_path = str(settings.DATABASES['default']['NAME'])
+    target_path = str(settings.REPORTING_SNAPSHOT_PATH)
+    partial_path = f"{target_path}.partial"
+
+    started = time.time()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(partial_path)
+    try:
+        if pages is None:
+            wal = source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            pages = -1 if wal else 1024
+        source.backup(target, pages=pages, sleep=sleep)
+        # Read-only connections cannot open a WAL file without its -shm
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+
+    os.utime(partial_path, (started, started))
+    os.replace(partial_path, target_path)
+    return datetime.fromtimestamp(started, tz=timezone.utc)
@@ -0,0 +1,144 @@
+from datetime import datetime, time
+
+from django.db.models import Q, F, Func, Sum, ExpressionWrapper, DecimalField, IntegerField
+from django.utils.timezone import make_aware
+
+from .models import Sale, DailyProductSales, ArchivedDailySales
+
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+# What a report row can be grouped by, and the label shown for it
+GROUPINGS = {
+    "product": "Product",
+    "payment": "Payment Mode",
+    "day": "Day",
+}
+
+
+class GrandTotal(Func):
+    """ SUM(<aggregate>) OVER () - the total of a grouped column, repeated on every row. """
+    template = "SUM(%(expressions)s) OVER ()"
+
+
+def _aware(day):
+    return make_aware(datetime.combine(day, time.min))
+
+
+def _sources(group_by):
+    """
+    Picks the tables a grouping can be answered from.
+
+    Product and day groupings read the small DailyProductSales rollup, which
+    also covers archived days. Payment mode, which the rollup does not keep,
+    needs the raw Sale rows plus the ArchivedDailySales summary of the sales
+    moved to the archive database.
+    """
+    if group_by == "payment":
+        revenue = ExpressionWrapper(F("quantity") * F("selling_price"), output_field=MONEY)
+        profit = ExpressionWrapper(
+            F("quantity") * (F("selling_price") - F("unit_cost")),
+            output_field=MONEY,
+        )
+        return [
+            (
+                Sale.objects.annotate(label=F("mode_of_payment")).values("label"),
+                lambda start, end: Q(sale_date__gte=_aware(start), sale_date__lt=_aware(end)),
+                revenue,
+                profit,
+            ),
+            (
+                ArchivedDailySales.objects.annotate(label=F("mode_of_payment")).values("label"),
+                lambda start, end: Q(date__gte=start, date__lt=end),
+                F("revenue"),
+                ExpressionWrapper(F("revenue") - F("cost"), output_field=MONEY),
+            ),
+        ]
+
+    if group_by == "day":
+        rows = DailyProductSales.objects.annotate(label=F("date")).values("label")
+    else:
+        rows = DailyProductSales.objects.annotate(label=F("product__name")).values("product_id", "label")
+    return [(rows, lambda start, end: Q(date__gte=start, date__lt=end), F("revenue"), F("profit"))]
+
+
+def _grouped(source, periods):
+    """ Runs one source's grouped query for every period at once. """
+    rows, in_period, revenue, profit = source
+
+    annotations = {}
+    everything = Q()
+    for name, (start, end) in periods.items():
+        condition = in_period(start, end)
+        everything |= condition
+        quantity_sum = Sum("quantity", filter=condition, default=0)
+        profit_sum = Sum(profit, filter=condition, default=0, output_field=MONEY)
+        annotations[f"{name}_quantity"] = quantity_sum
+        annotations[f"{name}_revenue"] = Sum(revenue, filter=condition, default=0, output_field=MONEY)
+        annotations[f"{name}_profit"] = profit_sum
+        annotations[f"{name}_grand_quantity"] = GrandTotal(quantity_sum, output_field=IntegerField())
+        annotations[f"{name}_grand_profit"] = GrandTotal(profit_sum, output_field=MONEY)
+
+    return list(rows.filter(everything).annotate(**annotations).order_by("label"))
+
+
+def build_report(periods, group_by="product"):
+    """
+    Aggregates sales for several periods in a single query per source table.
+
+    `periods` maps a name to a half-open (start, end) pair of dates. Each
+    period becomes a pair of conditional aggregates (`filter=Q(...)`) over the
+    same grouped rows, and its grand totals come back as window sums, so a
+    report is one round-trip per source with no summing in Python, except to
+    merge the payment report's hot and archived rows.
+
+    Returns {name: {"rows": [...], "total_quantity": n, "total_profit": x}},
+    where every row has "label", "total_quantity", "total_revenue" and
+    "total_profit".
+    """
+    if group_by not in GROUPINGS:
+        raise ValueError(f"Unknown report grouping: {group_by}")
+
+    sources = [_grouped(source, periods) for source in _sources(group_by)]
+    if len(sources) == 1:
+        results = sources[0]
+    else:
+        results = _merge(sources, periods)
+
+    report = {}
+    for name in periods:
+        first = results[0] if results else {}
+        report[name] = {
+            "rows": [
+                {
+                    "label": row["label"],
+                    "total_quantity": row[f"{name}_quantity"],
+                    "total_revenue": row[f"{name}_revenue"],
+                    "total_profit": row[f"{name}_profit"],
+                }
+                for row in results if row[f"{name}_quantity"]
+            ],
+            "total_quantity": first.get(f"{name}_grand_quantity") or 0,
+            "total_profit": first.get(f"{name}_grand_profit") or 0,
+        }
+    return report
+
+
+def _merge(sources, periods):
+    """ Sums the grouped rows of several sources that share labels, grand totals included. """
+    merged = {}
+    grand = {}
+    for results in sources:
+        for name in periods:
+            for column in (f"{name}_grand_quantity", f"{name}_grand_profit"):
+                grand[column] = grand.get(column, 0) + ((results[0][column] or 0) if results else 0)
+        for row in results:
+            total = merged.setdefault(row["label"], {"label": row["label"]})
+            for name in periods:
+                for column in (f"{name}_quantity", f"{name}_revenue", f"{name}_profit"):
+                    total[column] = total.get(column, 0) + row[column]
+
+    rows = sorted(merged.values(), key=lambda row: row["label"])
+    for row in rows:
+        row.update(grand)
+    return rows
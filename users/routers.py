@@ -0,0 +1,56 @@
+from .reporting import REPORTING_DB, reading_snapshot
+
+
+# Database alias holding the sales moved out by `manage.py archive_sales`
+ARCHIVE_DB = 'archive'
+
+ARCHIVE_MODELS = {'archivedsale'}
+
+# Models whose reads @snapshot_reads views send to the reporting snapshot
+REPORTING_MODELS = {'sale', 'products', 'customer', 'dailyproductsales', 'archiveddailysales'}
+
+
+class ArchiveRouter:
+    """ Keeps archived sales in the archive database and everything else out of it. """
+
+    def _is_archived(self, model):
+        return model._meta.app_label == 'users' and model._meta.model_name in ARCHIVE_MODELS
+
+    def db_for_read(self, model, **hints):
+        return ARCHIVE_DB if self._is_archived(model) else None
+
+    def db_for_write(self, model, **hints):
+        return ARCHIVE_DB if self._is_archived(model) else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'users' and model_name in ARCHIVE_MODELS:
+            return db == ARCHIVE_DB
+        if db == ARCHIVE_DB:
+            return False
+        return None
+
+
+class ReportingRouter:
+    """
+    Sends reads of sales, products and rollups to the reporting snapshot
+    while a @snapshot_reads view runs. Writes always go to the main database,
+    and the snapshot is never migrated: it is a copy of the main database.
+    """
+
+    def _is_reporting(self, model):
+        return model._meta.app_label == 'users' and model._meta.model_name in REPORTING_MODELS
+
+    def db_for_read(self, model, **hints):
+        if reading_snapshot() and self._is_reporting(model):
+            return REPORTING_DB
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {'default', REPORTING_DB}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTING_DB:
+            return False
+        return None
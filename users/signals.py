@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# Sent after sales are written in bulk (bulk_create sends no post_save), and
+# when an edit moves a sale to another day. Receivers get `days`, the set of
+# local dates whose sales changed beyond what post_save reports.
+sales_bulk_recorded = Signal()
@@ -1,3 +1,1452 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import sqlite3
+from collections import Counter
+from contextlib import closing
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router
+from django.db.models import Max, Min, Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.templatetags.static import static
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate, localtime, make_aware, now
+
+from .models import User, Products, Customer, Sale, DailyProductSales, StockMovement, StockSnapshot, ArchivedSale, ArchivedDailySales, Job
+from . import auth, middleware
+from .admin import SaleChangeListQuerySet
+from .analytics import as_list, reorder_suggestions, rolling_mean, rolling_std, sales_matrix, sales_totals
+from .auth import CachedModelBackend
+from .catalog import catalog_choices, low_stock_products, search_products
+from .exports import TRANSACTION_EXPORT_HEADER, newest_first
+from .imports import import_sales
+from .jobs import prune_jobs, result_path, run_job
+from .management.commands.benchmark_views import VIEWS, _counting_queries
+from .management.commands.loadtest_checkout import _cashier
+from .management.commands.vendor_static_assets import ASSETS, BOOTSTRAP_DIR
+from .middleware import QueryInstrumentationMiddleware, percentile, performance_summary
+from .pagination import EstimatedCountPaginator, encode_cursor, decode_cursor, keyset_page
+from .reporting import (
+    REPORTING_DB, reading_snapshot, refresh_snapshot, snapshot_reads, snapshot_refreshed_at, use_snapshot,
+)
+from .report_cache import cached_build_report, report_cache_stats
+from .reports import build_report
+from .views import _month_range
+
+
+# For tests that render pages or cache reports: caches stay in the test
+# process instead of .cache/, and static files resolve without collectstatic
+isolated = override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-default'},
+        'reports': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-reports'},
+        'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-auth'},
+    },
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+)
+
+
+def clear_caches():
+    """ TestCase never runs on_commit, so cached reports outlive their rows unless cleared. """
+    for cache in caches.all():
+        cache.clear()
+
+
+def make_product(name="Oud Noir", stock=5, cost_price="10.00", price="25.00"):
+    return Products.objects.create(
+        name=name, cost_price=Decimal(cost_price), price=Decimal(price), description="", stock=stock,
+    )
+
+
+def make_user(username="cashier", role=User.SHOPKEEPER, **fields):
+    return User.objects.create_user(username=username, password="not-a-real-password", role=role, **fields)
+
+
+def at(day, hour=0, minute=0):
+    """ An aware datetime on `day` at hour:minute. """
+    return make_aware(datetime.combine(day, time(hour, minute)))
+
+
+def csv_rows(response):
+    """ Every row of a streamed CSV response, header included. """
+    return list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))
+
+
+def make_sale(product, quantity=1, selling_price="25.00", customer_details="Walk-in", mode_of_payment="Cash", **fields):
+    sale = Sale(
+        product=product, quantity=quantity, selling_price=Decimal(selling_price),
+        customer_details=customer_details, mode_of_payment=mode_of_payment, **fields,
+    )
+    sale.save()
+    return sale
+
+
+class StockDecrementTests(TestCase):
+
+    def setUp(self):
+        self.product = make_product(stock=5)
+
+    def test_decrement_takes_stock_and_logs_it(self):
+        self.assertTrue(Products.objects.decrement_stock(self.product.pk, 3, note="test"))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+        movement = StockMovement.objects.get(product=self.product, kind=StockMovement.SALE)
+        self.assertEqual(movement.quantity, -3)
+
+    def test_decrement_can_sell_the_last_unit(self):
+        self.assertTrue(Products.objects.decrement_stock(self.product.pk, 5))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+    def test_decrement_refuses_to_oversell(self):
+        self.assertFalse(Products.objects.decrement_stock(self.product.pk, 6))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+        self.assertFalse(StockMovement.objects.filter(kind=StockMovement.SALE).exists())
+
+    def test_sale_beyond_stock_records_nothing(self):
+        with self.assertRaises(ValueError):
+            make_sale(self.product, quantity=6)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(DailyProductSales.objects.exists())
+
+    def test_stock_matches_ledger_after_sales(self):
+        make_sale(self.product, quantity=2)
+        make_sale(self.product, quantity=1)
+
+        self.product.refresh_from_db()
+        ledger = StockMovement.objects.filter(product=self.product).aggregate(total=Sum("quantity"))["total"]
+        self.assertEqual(self.product.stock, 2)
+        self.assertEqual(ledger, 2)
+
+
+@isolated
+class DateRangeFilterTests(TestCase):
+
+    def setUp(self):
+        self.product = make_product(stock=100)
+        self.day = date(2026, 3, 10)
+        self.client.force_login(make_user())
+        for moment in (at(self.day), at(self.day, 23, 59), at(self.day + timedelta(days=1)), at(self.day) - timedelta(minutes=1)):
+            make_sale(self.product, sale_date=moment)
+
+    def test_transaction_date_filter_is_half_open(self):
+        response = self.client.get(reverse('transaction_list'), {'date': '2026-03-10'})
+
+        dates = sorted(sale.sale_date for sale in response.context['transactions'])
+        self.assertEqual(dates, [at(self.day), at(self.day, 23, 59)])
+
+    def test_daily_report_covers_exactly_one_day(self):
+        response = self.client.get(reverse('reports_view'), {'date': '2026-03-10', 'month': 3, 'year': 2026})
+
+        self.assertEqual([row['total_quantity'] for row in response.context['daily_sales_report']], [2])
+        self.assertEqual([row['total_quantity'] for row in response.context['monthly_sales_report']], [4])
+
+    def test_month_range_rolls_over_the_year(self):
+        self.assertEqual(_month_range(2026, 12), (at(date(2026, 12, 1)), at(date(2027, 1, 1))))
+
+
+@isolated
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        product = make_product(stock=100)
+        day = date(2026, 3, 10)
+        # Two sales share a timestamp, so only the id orders them
+        moments = [at(day, 9), at(day, 10), at(day, 10), at(day, 11), at(day, 12)]
+        self.sales = [make_sale(product, sale_date=moment) for moment in moments]
+        self.newest_first = sorted(self.sales, key=lambda sale: (sale.sale_date, sale.pk), reverse=True)
+
+    def page(self, **cursor):
+        return keyset_page(Sale.objects.all(), 2, **cursor)
+
+    def test_cursor_round_trip(self):
+        sale = self.sales[1]
+        self.assertEqual(decode_cursor(encode_cursor(sale)), (sale.sale_date, sale.pk))
+
+    def test_malformed_cursors_are_ignored(self):
+        for cursor in ("", "not base64!", "bm90aGluZw==", "YWJjfGRlZg=="):
+            self.assertIsNone(decode_cursor(cursor))
+        self.assertEqual(self.page(after="garbage")["object_list"], self.newest_first[:2])
+
+    def test_pages_forwards_and_back(self):
+        first = self.page()
+        second = self.page(after=first["next_cursor"])
+        third = self.page(after=second["next_cursor"])
+
+        self.assertEqual(first["object_list"] + second["object_list"] + third["object_list"], self.newest_first)
+        self.assertIsNone(first["previous_cursor"])
+        self.assertIsNone(third["next_cursor"])
+        self.assertEqual(self.page(before=third["previous_cursor"])["object_list"], second["object_list"])
+        self.assertEqual(self.page(before=second["previous_cursor"])["object_list"], first["object_list"])
+
+    def test_transaction_list_follows_cursors(self):
+        self.client.force_login(make_user())
+        url = reverse('transaction_list')
+
+        first = self.client.get(url, {'page_size': 3})
+        second = self.client.get(f"{url}?{first.context['next_query']}")
+
+        self.assertEqual(list(first.context['transactions']), self.newest_first[:3])
+        self.assertEqual(list(second.context['transactions']), self.newest_first[3:])
+        self.assertIsNone(second.context['next_query'])
+        self.assertEqual(self.client.get(url, {'after': '%%%'}).status_code, 200)
+
+
+@isolated
+class DailyRollupTests(TestCase):
+
+    def setUp(self):
+        self.product = make_product(stock=100)
+        self.other = make_product(name="Vetiver", stock=100, cost_price="4.00")
+
+    def rollup(self, product=None, day=None):
+        return DailyProductSales.objects.filter(
+            product=product or self.product, date=day or localdate(),
+        ).values_list("quantity", "revenue", "cost", "profit").first()
+
+    def test_new_sale_is_added(self):
+        make_sale(self.product, quantity=2)
+        make_sale(self.product, quantity=1, selling_price="30.00")
+
+        self.assertEqual(self.rollup(), (3, Decimal("80.00"), Decimal("30.00"), Decimal("50.00")))
+
+    def test_edited_sale_replaces_its_old_figures(self):
+        sale = make_sale(self.product, quantity=2)
+
+        sale.quantity = 4
+        sale.selling_price = Decimal("20.00")
+        sale.save()
+
+        self.assertEqual(self.rollup(), (4, Decimal("80.00"), Decimal("40.00"), Decimal("40.00")))
+
+    def test_sale_moved_to_another_day_and_product(self):
+        sale = make_sale(self.product, quantity=2)
+        yesterday = localdate() - timedelta(days=1)
+
+        sale.sale_date -= timedelta(days=1)
+        sale.product = self.other
+        sale.unit_cost = self.other.cost_price
+        sale.save()
+
+        self.assertIsNone(self.rollup())
+        self.assertEqual(
+            self.rollup(self.other, yesterday), (2, Decimal("50.00"), Decimal("8.00"), Decimal("42.00")),
+        )
+
+    def test_deleted_sale_is_taken_out(self):
+        kept = make_sale(self.product, quantity=2)
+        make_sale(self.product, quantity=3).delete()
+
+        self.assertEqual(self.rollup(), (2, Decimal("50.00"), Decimal("20.00"), Decimal("30.00")))
+        kept.delete()
+        self.assertIsNone(self.rollup())
+
+    def test_queryset_delete_is_taken_out(self):
+        make_sale(self.product, quantity=2)
+        make_sale(self.product, quantity=3)
+
+        Sale.objects.all().delete()
+
+        self.assertFalse(DailyProductSales.objects.exists())
+
+    def test_basket_is_added(self):
+        Sale.objects.record_basket(
+            [(self.product, 2, Decimal("25.00")), (self.other, 1, Decimal("9.00"))], "Walk-in", "Card",
+        )
+
+        self.assertEqual(self.rollup(), (2, Decimal("50.00"), Decimal("20.00"), Decimal("30.00")))
+        self.assertEqual(self.rollup(self.other), (1, Decimal("9.00"), Decimal("4.00"), Decimal("5.00")))
+
+    def test_rebuild_matches_the_live_rollup(self):
+        make_sale(self.product, quantity=2)
+        make_sale(self.other, quantity=1, sale_date=at(date(2026, 3, 10), 15))
+        live = set(DailyProductSales.objects.values_list("date", "product", "quantity", "revenue", "cost", "profit"))
+
+        DailyProductSales.objects.update(quantity=99)
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+
+        rebuilt = set(DailyProductSales.objects.values_list("date", "product", "quantity", "revenue", "cost", "profit"))
+        self.assertEqual(rebuilt, live)
+
+
+class BuildReportTests(TestCase):
+
+    def setUp(self):
+        self.day = date(2026, 3, 10)
+        oud = make_product(stock=100)
+        vetiver = make_product(name="Vetiver", stock=100, cost_price="4.00")
+        make_sale(oud, quantity=2, sale_date=at(self.day, 9))
+        make_sale(vetiver, quantity=1, selling_price="9.00", mode_of_payment="Card", sale_date=at(self.day, 18))
+        make_sale(oud, quantity=1, selling_price="30.00", mode_of_payment="Card", sale_date=at(self.day + timedelta(days=1), 9))
+        self.periods = {
+            "first": (self.day, self.day + timedelta(days=1)),
+            "both": (self.day, self.day + timedelta(days=2)),
+            "empty": (self.day + timedelta(days=5), self.day + timedelta(days=6)),
+        }
+
+    def figures(self, section):
+        rows = [(row["label"], row["total_quantity"], row["total_revenue"], row["total_profit"]) for row in section["rows"]]
+        return rows, section["total_quantity"], section["total_profit"]
+
+    def test_by_product_in_one_query(self):
+        with self.assertNumQueries(1):
+            report = build_report(self.periods, "product")
+
+        self.assertEqual(self.figures(report["first"]), (
+            [("Oud Noir", 2, Decimal("50.00"), Decimal("30.00")), ("Vetiver", 1, Decimal("9.00"), Decimal("5.00"))],
+            3, Decimal("35.00"),
+        ))
+        self.assertEqual(self.figures(report["both"]), (
+            [("Oud Noir", 3, Decimal("80.00"), Decimal("50.00")), ("Vetiver", 1, Decimal("9.00"), Decimal("5.00"))],
+            4, Decimal("55.00"),
+        ))
+        self.assertEqual(self.figures(report["empty"]), ([], 0, 0))
+
+    def test_by_payment_mode(self):
+        report = build_report(self.periods, "payment")
+
+        self.assertEqual(self.figures(report["first"])[0], [
+            ("Card", 1, Decimal("9.00"), Decimal("5.00")), ("Cash", 2, Decimal("50.00"), Decimal("30.00")),
+        ])
+        self.assertEqual(self.figures(report["both"]), (
+            [("Card", 2, Decimal("39.00"), Decimal("25.00")), ("Cash", 2, Decimal("50.00"), Decimal("30.00"))],
+            4, Decimal("55.00"),
+        ))
+
+    def test_by_day(self):
+        rows, quantity, profit = self.figures(build_report(self.periods, "day")["both"])
+
+        self.assertEqual([row[:2] for row in rows], [(self.day, 3), (self.day + timedelta(days=1), 1)])
+        self.assertEqual((quantity, profit), (4, Decimal("55.00")))
+
+    def test_unknown_grouping_is_refused(self):
+        with self.assertRaises(ValueError):
+            build_report(self.periods, "customer")
+
+
+@isolated
+class ExportTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.day = date(2026, 3, 10)
+        self.oud = make_product(stock=100)
+        self.vetiver = make_product(name="Vetiver", stock=100, cost_price="4.00")
+        make_sale(self.oud, quantity=2, customer_details="Amina Noor", sale_date=at(self.day, 9))
+        make_sale(self.vetiver, selling_price="9.00", customer_details="Brian Otieno", sale_date=at(self.day, 18))
+        make_sale(self.oud, customer_details="amina  noor", sale_date=at(self.day + timedelta(days=1), 9))
+        self.client.force_login(make_user())
+
+    def export(self, **filters):
+        response = self.client.get(reverse('export_transactions'), filters)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return csv_rows(response)
+
+    def test_transactions_newest_first(self):
+        rows = self.export()
+
+        self.assertEqual(rows[0], [
+            "Date", "Product", "Quantity", "Selling Price", "Total Price", "Total Profit", "Customer", "Mode of Payment",
+        ])
+        # Money compares as Decimal: SQLite drops the trailing zeros of computed sums
+        self.assertEqual([(row[1], int(row[2]), *map(Decimal, row[3:6]), row[6]) for row in rows[1:]], [
+            ("Oud Noir", 1, Decimal("25"), Decimal("25"), Decimal("15"), "amina  noor"),
+            ("Vetiver", 1, Decimal("9"), Decimal("9"), Decimal("5"), "Brian Otieno"),
+            ("Oud Noir", 2, Decimal("25"), Decimal("50"), Decimal("30"), "Amina Noor"),
+        ])
+
+    def test_transaction_filters(self):
+        self.assertEqual([row[1] for row in self.export(product=self.vetiver.pk)[1:]], ["Vetiver"])
+        self.assertEqual([row[6] for row in self.export(customer="AMINA")[1:]], ["amina  noor", "Amina Noor"])
+        self.assertEqual([row[6] for row in self.export(customer="amina", date="2026-03-10")[1:]], ["Amina Noor"])
+        self.assertEqual(len(self.export(date="not a date")), 4)
+
+    def test_sales_report_matches_the_page(self):
+        query = {'date': '2026-03-10', 'month': 3, 'year': 2026}
+        rows = csv_rows(self.client.get(reverse('export_sales_report'), query))
+
+        self.assertEqual(rows[0], ["Period", "Product", "Total Quantity", "Total Price", "Total Profit"])
+        self.assertEqual([(*row[:2], int(row[2]), *map(Decimal, row[3:])) for row in rows[1:]], [
+            ("daily", "Oud Noir", 2, Decimal("50"), Decimal("30")),
+            ("daily", "Vetiver", 1, Decimal("9"), Decimal("5")),
+            ("monthly", "Oud Noir", 3, Decimal("75"), Decimal("45")),
+            ("monthly", "Vetiver", 1, Decimal("9"), Decimal("5")),
+        ])
+
+
+class ImportValidationTests(TestCase):
+
+    def setUp(self):
+        self.product = make_product(stock=5)
+
+    def row(self, **fields):
+        row = {
+            "product": str(self.product.pk), "quantity": "1", "selling_price": "25.00",
+            "customer_details": "Walk-in", "mode_of_payment": "Cash", "sale_date": "",
+        }
+        row.update(fields)
+        return row
+
+    def reasons(self, rows):
+        imported, rejects = import_sales(rows)
+        return imported, [(line, reason) for line, _, reason in rejects]
+
+    def test_valid_rows_are_imported(self):
+        day = localdate() - timedelta(days=3)
+        imported, rejects = self.reasons([
+            self.row(quantity="2"),
+            self.row(product=self.product.name.upper(), sale_date=day.isoformat()),
+        ])
+
+        self.assertEqual((imported, rejects), (2, []))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+        self.assertEqual(DailyProductSales.objects.get(date=day).quantity, 1)
+
+    def test_invalid_rows_are_rejected_one_by_one(self):
+        imported, rejects = self.reasons([
+            self.row(product="²"),
+            self.row(product="Nothing like it"),
+            self.row(quantity="0"),
+            self.row(quantity="two"),
+            self.row(selling_price="NaN"),
+            self.row(selling_price="Infinity"),
+            self.row(selling_price="-1"),
+            self.row(customer_details=""),
+            self.row(mode_of_payment="x" * 21),
+            self.row(sale_date="yesterday"),
+            self.row(),
+        ])
+
+        self.assertEqual(imported, 1)
+        self.assertEqual([line for line, _ in rejects], list(range(2, 12)))
+        self.assertEqual(rejects[0], (2, "Unknown product: '²'"))
+        self.assertEqual(rejects[4], (6, "Selling price must be a number"))
+
+    def test_rows_beyond_stock_are_rejected(self):
+        imported, rejects = self.reasons([self.row(quantity="3"), self.row(quantity="3")])
+
+        self.assertEqual(imported, 1)
+        self.assertEqual(rejects, [(3, f"Not enough stock for {self.product.name}")])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+
+
+class BasketTests(TestCase):
+
+    def setUp(self):
+        self.oud = make_product(stock=5)
+        self.vetiver = make_product(name="Vetiver", stock=2, cost_price="4.00")
+
+    def test_basket_takes_stock_and_records_every_line(self):
+        sales = Sale.objects.record_basket(
+            [(self.oud, 2, Decimal("25.00")), (self.vetiver, 1, Decimal("9.00")), (self.oud, 1, Decimal("20.00"))],
+            "Amina Noor", "Card",
+        )
+
+        self.assertEqual(len(sales), 3)
+        self.assertEqual(len({sale.customer_id for sale in sales}), 1)
+        self.assertEqual(Products.objects.get(pk=self.oud.pk).stock, 2)
+        self.assertEqual(Products.objects.get(pk=self.vetiver.pk).stock, 1)
+        rollup = DailyProductSales.objects.get(product=self.oud)
+        self.assertEqual((rollup.quantity, rollup.revenue, rollup.cost), (3, Decimal("70.00"), Decimal("30.00")))
+
+    def test_short_stock_records_nothing(self):
+        with self.assertRaisesMessage(ValueError, "Not enough stock for Vetiver"):
+            Sale.objects.record_basket(
+                [(self.oud, 2, Decimal("25.00")), (self.vetiver, 3, Decimal("9.00"))], "Amina Noor", "Card",
+            )
+
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(StockMovement.objects.filter(kind=StockMovement.SALE).exists())
+        self.assertEqual(Products.objects.get(pk=self.oud.pk).stock, 5)
+        self.assertFalse(DailyProductSales.objects.exists())
+
+    @isolated
+    def test_checkout_view(self):
+        self.client.force_login(make_user())
+        data = {
+            'customer_details': "Amina Noor", 'mode_of_payment': "Cash",
+            'lines-TOTAL_FORMS': 2, 'lines-INITIAL_FORMS': 0,
+            'lines-0-product': self.oud.pk, 'lines-0-quantity': 1, 'lines-0-selling_price': "25.00",
+            'lines-1-product': self.vetiver.pk, 'lines-1-quantity': 5, 'lines-1-selling_price': "9.00",
+        }
+
+        response = self.client.post(reverse('record_basket'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Not enough stock for Vetiver")
+        self.assertFalse(Sale.objects.exists())
+
+        data['lines-1-quantity'] = 2
+        response = self.client.post(reverse('record_basket'), data)
+        self.assertRedirects(response, reverse('shopkeeper_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(Sale.objects.count(), 2)
+
+
+class UnitCostTests(TestCase):
+
+    def setUp(self):
+        self.product = make_product(stock=10, cost_price="10.00")
+
+    def test_profit_uses_the_cost_at_sale_time(self):
+        sale = make_sale(self.product, quantity=2)
+        self.product.cost_price = Decimal("18.00")
+        self.product.save()
+
+        sale.refresh_from_db()
+        self.assertEqual(sale.unit_cost, Decimal("10.00"))
+        self.assertEqual(sale.total_profit, Decimal("30.00"))
+        today = localdate(sale.sale_date)
+        report = build_report({'day': (today, today + timedelta(days=1))}, "payment")
+        self.assertEqual(report['day']['total_profit'], Decimal("30.00"))
+
+    def test_cleared_unit_cost_falls_back_to_the_product_cost(self):
+        sale = make_sale(self.product, unit_cost=Decimal("7.00"))
+        self.product.cost_price = Decimal("12.00")
+        self.product.save()
+
+        sale.unit_cost = None
+        sale.save()
+
+        sale.refresh_from_db()
+        self.assertEqual(sale.unit_cost, Decimal("12.00"))
+        self.assertEqual(DailyProductSales.objects.get(product=self.product).cost, Decimal("12.00"))
+
+    @isolated
+    def test_admin_edit_with_a_blank_unit_cost(self):
+        sale = make_sale(self.product)
+        self.client.force_login(User.objects.create_superuser("owner", password="not-a-real-password"))
+        local = localtime(sale.sale_date)
+
+        response = self.client.post(reverse('admin:users_sale_change', args=[sale.pk]), {
+            'product': self.product.pk, 'quantity': 2, 'selling_price': "25.00", 'unit_cost': "",
+            'customer_details': "Walk-in", 'mode_of_payment': "Cash",
+            'sale_date_0': local.date().isoformat(), 'sale_date_1': local.time().strftime("%H:%M:%S"),
+        })
+
+        self.assertEqual(response.status_code, 302)
+        sale.refresh_from_db()
+        self.assertEqual((sale.quantity, sale.unit_cost), (2, Decimal("10.00")))
+
+
+@isolated
+class ReportCacheTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.product = make_product(stock=100)
+        self.day = date(2026, 3, 10)
+        self.periods = {
+            'yesterday': (self.day - timedelta(days=1), self.day),
+            'daily': (self.day, self.day + timedelta(days=1)),
+            'monthly': (date(2026, 3, 1), date(2026, 4, 1)),
+        }
+
+    def misses(self):
+        """ Periods recomputed by one cached_build_report call. """
+        before = report_cache_stats()["misses"]
+        report = cached_build_report(self.periods)
+        return report_cache_stats()["misses"] - before, report
+
+    def test_second_read_is_served_from_the_cache(self):
+        make_sale(self.product, quantity=2, sale_date=at(self.day, 9))
+
+        missed, first = self.misses()
+        self.assertEqual(missed, 3)
+        missed, second = self.misses()
+        self.assertEqual(missed, 0)
+        self.assertEqual(second, first)
+        self.assertEqual(second['monthly']['total_quantity'], 2)
+
+    def test_a_sale_only_invalidates_its_day_and_month(self):
+        self.misses()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_sale(self.product, quantity=3, sale_date=at(self.day, 9))
+
+        missed, report = self.misses()
+        self.assertEqual(missed, 2)
+        self.assertEqual([report[name]['total_quantity'] for name in self.periods], [0, 3, 3])
+
+    def test_a_product_change_invalidates_every_report(self):
+        make_sale(self.product, sale_date=at(self.day, 9))
+        self.misses()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Oud Blanc"
+            self.product.save()
+
+        missed, report = self.misses()
+        self.assertEqual(missed, 3)
+        self.assertEqual(report['daily']['rows'][0]['label'], "Oud Blanc")
+
+
+class SqlitePragmaTests(TestCase):
+    databases = {'default', REPORTING_DB}
+
+    def pragma(self, name, alias='default', as_alias=None):
+        """ Reads a PRAGMA on a fresh connection, optionally opened under another alias. """
+        connection = connections.create_connection(alias)
+        connection.alias = as_alias or alias
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA {name}")
+                return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096, 'busy_timeout': 1234})
+    def test_new_connections_get_the_pragmas(self):
+        self.assertEqual(self.pragma('cache_size'), -4096)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_the_reporting_snapshot_is_left_alone(self):
+        self.assertNotEqual(self.pragma('busy_timeout', as_alias=REPORTING_DB), 1234)
+
+    def test_no_pragmas_by_default(self):
+        self.assertNotEqual(self.pragma('cache_size'), -64 * 1024)
+
+
+@isolated
+class ConditionalApiTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.product = make_product(stock=10)
+        make_sale(self.product)
+        self.client.force_login(make_user())
+
+    def get(self, name, etag=None, **query):
+        headers = {'if_none_match': etag} if etag else {}
+        return self.client.get(reverse(name), query, headers=headers)
+
+    def test_unchanged_data_is_not_modified(self):
+        for name in ('api_products', 'api_stock', 'api_transactions', 'api_reports'):
+            with self.subTest(name):
+                first = self.get(name)
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual(self.get(name, first['ETag']).status_code, 304)
+
+    def test_filters_get_their_own_etag(self):
+        everything = self.get('api_transactions')['ETag']
+        self.assertNotEqual(self.get('api_transactions', product=self.product.pk)['ETag'], everything)
+        self.assertEqual(self.get('api_transactions', everything, product=self.product.pk).status_code, 200)
+
+    def test_a_product_change_breaks_the_transactions_etag(self):
+        etag = self.get('api_transactions')['ETag']
+        self.product.name = "Oud Blanc"
+        self.product.save()
+
+        response = self.get('api_transactions', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['transactions'][0]['product'], "Oud Blanc")
+
+    def test_reports_follow_the_clock(self):
+        today = now()
+        response = self.get('api_reports')
+        self.assertNotIn('Last-Modified', response)
+
+        with mock.patch('users.views.now', return_value=today + timedelta(days=1)):
+            tomorrow = self.get('api_reports', response['ETag'])
+        self.assertEqual(tomorrow.status_code, 200)
+        self.assertEqual(tomorrow.json()['periods']['daily']['total_quantity'], 0)
+
+    def test_malformed_filters_are_ignored(self):
+        for product in ('abc', str(2 ** 70)):
+            with self.subTest(product):
+                response = self.get('api_transactions', product=product)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['transactions']), 1)
+
+
+class QueryInstrumentationTests(TestCase):
+
+    def setUp(self):
+        middleware._samples.clear()
+        middleware._duplicates.clear()
+        self.product = make_product()
+
+    def handle(self, view_name="product_list", lookups=3):
+        """ Runs a request through the middleware with a view that repeats one query `lookups` times. """
+        def view(request):
+            for _ in range(lookups):
+                Products.objects.filter(pk=self.product.pk).exists()
+            return HttpResponse("ok")
+
+        request = RequestFactory().get("/products/")
+        request.resolver_match = mock.Mock(view_name=view_name)
+        return QueryInstrumentationMiddleware(view)(request)
+
+    def test_server_timing_counts_the_queries(self):
+        response = self.handle(lookups=3)
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="3 queries", app;dur=[\d.]+$')
+
+    def test_summary_percentiles_and_repeated_queries(self):
+        for lookups in (1, 2, 3, 4):
+            self.handle(lookups=lookups)
+        self.handle("sales_report", lookups=1)
+
+        summary = {row["view"]: row for row in performance_summary()}
+        self.assertEqual(summary["product_list"]["requests"], 4)
+        self.assertEqual(summary["product_list"]["queries_p50"], 3)
+        self.assertEqual(summary["product_list"]["queries_max"], 4)
+        (sql, count), = summary["product_list"]["duplicates"]
+        self.assertIn('"users_products"', sql)
+        self.assertEqual(count, 9)
+        self.assertEqual(summary["sales_report"]["duplicates"], [])
+
+    @override_settings(PERF_MAX_QUERIES=2)
+    def test_requests_over_the_query_budget_are_logged(self):
+        with self.assertLogs("users.performance", "WARNING") as logs:
+            self.handle(lookups=3)
+        self.assertIn("3 queries", logs.output[0])
+        self.assertIn("3x SELECT", logs.output[0])
+
+    def test_trim_keeps_the_most_common(self):
+        counter = Counter({"a": 5, "b": 1, "c": 3})
+        middleware._trim(counter, 2)
+        self.assertEqual(counter, Counter({"a": 5, "c": 3}))
+
+    def test_percentile(self):
+        values = list(range(100, 0, -1))
+        self.assertEqual(percentile(values, 0.50), 51)
+        self.assertEqual(percentile(values, 0.99), 100)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+
+@isolated
+class BenchmarkViewsTests(TestCase):
+    databases = {'default', 'archive'}
+
+    def setUp(self):
+        clear_caches()
+        make_sale(make_product(stock=10), quantity=2)
+        self.output = NamedTemporaryFile(suffix=".json", delete=False).name
+        self.addCleanup(os.remove, self.output)
+
+    def benchmark(self, *args):
+        stdout = StringIO()
+        # The test runner has already set up the test environment the command asks for
+        with mock.patch('users.management.commands.benchmark_views.setup_test_environment'):
+            call_command('benchmark_views', '--repeat', '2', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_every_view_is_measured(self):
+        self.benchmark('--label', 'test', '--output', self.output)
+
+        with open(self.output) as source:
+            run = json.load(source)
+        self.assertEqual((run['label'], run['repeat'], run['data']), ('test', 2, {'products': 1, 'sales': 1}))
+        self.assertEqual(len(run['views']), len(VIEWS))
+        for url, stats in run['views'].items():
+            with self.subTest(url):
+                self.assertEqual(stats['status'], 200)
+                self.assertGreater(stats['queries'], 0)
+                self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_compare_prints_the_difference(self):
+        self.benchmark('--output', self.output)
+        self.assertIn("(p95 ", self.benchmark('--compare', self.output, '--cold-reports'))
+
+    def test_queries_are_counted_on_every_alias(self):
+        with _counting_queries() as totals:
+            Products.objects.count()
+            ArchivedSale.objects.count()
+        self.assertEqual(totals['queries'], 2)
+
+
+@isolated
+class LoadtestCheckoutTests(TestCase):
+
+    def test_cashier_sells_until_stock_runs_out(self):
+        product = make_product(stock=3)
+        user = make_user()
+
+        # In this thread, so the sales land in the test transaction
+        stats = _cashier(0, user.pk, [product.pk], 1, 0.5, seed=1)
+
+        self.assertEqual((stats["sold"], stats["locked"], stats["errors"]), (3, 0, 0))
+        self.assertGreater(stats["rejected"], 0)
+        self.assertEqual(len(stats["latencies"]), stats["sold"] + stats["rejected"])
+        self.assertEqual(Products.objects.get(pk=product.pk).stock, 0)
+        self.assertEqual(Sale.objects.filter(customer_details="loadtest 0").aggregate(units=Sum("quantity"))["units"], 3)
+
+    def test_nothing_to_sell(self):
+        with self.assertRaisesMessage(CommandError, "No products to sell"):
+            call_command('loadtest_checkout', '--seconds', '0')
+
+
+@isolated
+class CatalogTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.oud = make_product(stock=8)
+        self.vetiver = make_product(name="Vetiver", stock=2)
+        self.amber = make_product(name="Amber Oud", stock=5)
+
+    def test_search_products(self):
+        self.assertEqual([product.name for product in search_products()], ["Amber Oud", "Oud Noir", "Vetiver"])
+        self.assertEqual([product.name for product in search_products("OUD")], ["Amber Oud", "Oud Noir"])
+
+    def test_low_stock_products(self):
+        self.assertEqual([row["name"] for row in low_stock_products(limit=2)], ["Vetiver", "Amber Oud"])
+
+    def test_choices_follow_every_catalog_change(self):
+        self.assertEqual(catalog_choices(), [
+            (self.amber.pk, "Amber Oud", 5), (self.oud.pk, "Oud Noir", 8), (self.vetiver.pk, "Vetiver", 2),
+        ])
+        with self.assertNumQueries(1):
+            catalog_choices()
+
+        make_sale(self.oud, quantity=3)
+        self.assertIn((self.oud.pk, "Oud Noir", 5), catalog_choices())
+        self.vetiver.delete()
+        self.assertEqual([name for _, name, _ in catalog_choices()], ["Amber Oud", "Oud Noir"])
+
+    @override_settings(PRODUCTS_PAGE_SIZE=2)
+    def test_product_list_pages(self):
+        self.client.force_login(make_user())
+
+        first = self.client.get(reverse('product_list'))
+        self.assertEqual([product.name for product in first.context['products']], ["Amber Oud", "Oud Noir"])
+        second = self.client.get(reverse('product_list'), {'page': 2})
+        self.assertEqual([product.name for product in second.context['products']], ["Vetiver"])
+        found = self.client.get(reverse('product_list'), {'q': 'vet', 'page': 99})
+        self.assertEqual([product.name for product in found.context['products']], ["Vetiver"])
+
+
+class CustomerTests(TestCase):
+
+    def test_spellings_of_one_customer_share_a_row(self):
+        resolved = Customer.objects.resolve(["Amina  Noor", "amina noor", " AMINA NOOR "])
+
+        self.assertEqual(len({customer.pk for customer in resolved.values()}), 1)
+        customer = resolved["amina noor"]
+        # Named after whichever spelling came first, with its whitespace collapsed
+        self.assertIn(customer.name, {"Amina Noor", "amina noor", "AMINA NOOR"})
+        self.assertEqual((customer.search_key, customer.phone), ("amina noor", ""))
+        self.assertEqual(Customer.objects.resolve(["AMINA noor"])["AMINA noor"], customer)
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_phone_numbers_are_kept_as_phones(self):
+        resolved = Customer.objects.resolve(["+254 (712) 345-678", "Room 12"])
+
+        self.assertEqual(resolved["+254 (712) 345-678"].phone, "+254712345678")
+        self.assertEqual(resolved["Room 12"].phone, "")
+
+    def test_sales_are_linked_to_their_customer(self):
+        product = make_product(stock=10)
+        first = make_sale(product, customer_details="Brian Otieno")
+        second = make_sale(product, customer_details="brian  otieno")
+
+        self.assertIsNotNone(first.customer_id)
+        self.assertEqual(first.customer_id, second.customer_id)
+
+    def test_prefix_search(self):
+        Customer.objects.resolve(["Amina Noor", "Amir Hassan", "Brian Otieno", "Amina Wanjiru"])
+
+        self.assertEqual(
+            list(Customer.objects.prefix_search(" AMI").order_by("search_key").values_list("name", flat=True)),
+            ["Amina Noor", "Amina Wanjiru", "Amir Hassan"],
+        )
+        self.assertEqual(Customer.objects.prefix_search("amina n").get().name, "Amina Noor")
+        self.assertFalse(Customer.objects.prefix_search("zz").exists())
+
+
+@isolated
+class CustomerViewTests(TestCase):
+
+    def setUp(self):
+        product = make_product(stock=10)
+        self.amina = make_sale(product, customer_details="Amina Noor").customer
+        make_sale(product, customer_details="Amir Hassan")
+        self.client.force_login(make_user())
+
+    def test_autocomplete(self):
+        response = self.client.get(reverse('api_customers'), {'q': 'ami'})
+        self.assertEqual([row['name'] for row in response.json()['customers']], ["Amina Noor", "Amir Hassan"])
+        self.assertEqual(self.client.get(reverse('api_customers'), {'q': ' '}).json(), {'customers': []})
+
+    def test_transactions_by_customer(self):
+        response = self.client.get(reverse('transaction_list'), {'customer_id': self.amina.pk})
+        self.assertEqual([sale.customer_details for sale in response.context['transactions']], ["Amina Noor"])
+
+        for customer_id in ('abc', '-1', str(2 ** 70)):
+            with self.subTest(customer_id):
+                response = self.client.get(reverse('transaction_list'), {'customer_id': customer_id})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['transactions']), 2)
+
+
+class StockAtTests(TestCase):
+
+    def setUp(self):
+        self.start = at(date(2026, 3, 10), 9)
+        self.product = make_product(stock=10)
+        make_sale(self.product, quantity=3)
+        restock, sale = StockMovement.objects.filter(product=self.product).order_by('id')
+        StockMovement.objects.filter(pk=restock.pk).update(occurred_at=self.start)
+        StockMovement.objects.filter(pk=sale.pk).update(occurred_at=self.start + timedelta(hours=2))
+
+    def test_replays_the_ledger(self):
+        self.assertEqual(self.product.stock_at(self.start - timedelta(seconds=1)), 0)
+        self.assertEqual(self.product.stock_at(self.start), 10)
+        self.assertEqual(self.product.stock_at(self.start + timedelta(hours=1)), 10)
+        self.assertEqual(self.product.stock_at(now()), 7)
+
+    def test_starts_from_the_latest_snapshot(self):
+        call_command('snapshot_stock', stdout=StringIO())
+        snapshot = StockSnapshot.objects.get(product=self.product)
+        self.assertEqual((snapshot.stock, snapshot.last_movement_id), (7, StockMovement.objects.latest('id').pk))
+        make_sale(self.product, quantity=2)
+
+        # A doctored snapshot shows which rows were read
+        StockSnapshot.objects.filter(pk=snapshot.pk).update(stock=100)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.product.stock_at(now()), 98)
+        self.assertEqual(self.product.stock_at(self.start + timedelta(hours=1)), 10)
+
+    def test_movements_after_the_snapshot_use_the_index(self):
+        plan = StockMovement.objects.filter(product=self.product, id__gt=1).explain()
+        self.assertIn("users_stock_product_a336ed_idx (product_id=? AND id>?)", plan)
+
+
+@isolated
+class AdminTests(TestCase):
+
+    def setUp(self):
+        self.oud = make_product(stock=8)
+        self.vetiver = make_product(name="Vetiver", stock=2)
+        for day in (date(2025, 12, 31), date(2026, 3, 10), date(2026, 3, 20)):
+            make_sale(self.oud, sale_date=at(day, 12))
+        self.client.force_login(User.objects.create_superuser("owner", password="not-a-real-password"))
+
+    def test_changelists(self):
+        for url, query in [
+            (reverse('admin:users_sale_changelist'), {}),
+            (reverse('admin:users_sale_changelist'), {'sale_date__year': 2026, 'sale_date__month': 3}),
+            (reverse('admin:users_products_changelist'), {'q': 'oud'}),
+        ]:
+            with self.subTest(url=url, query=query):
+                self.assertEqual(self.client.get(url, query).status_code, 200)
+
+    def test_date_hierarchy_matches_truncation(self):
+        sales = SaleChangeListQuerySet(Sale)
+        for kind in ('year', 'month', 'day'):
+            with self.subTest(kind):
+                self.assertEqual(list(sales.datetimes('sale_date', kind)), list(Sale.objects.datetimes('sale_date', kind)))
+        self.assertEqual(
+            sales.aggregate(first=Min('sale_date'), last=Max('sale_date')),
+            Sale.objects.aggregate(first=Min('sale_date'), last=Max('sale_date')),
+        )
+
+    def test_estimated_count_stops_at_the_limit(self):
+        paginator = EstimatedCountPaginator(Sale.objects.order_by('-id'), 1)
+        paginator.count_limit = 2
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(EstimatedCountPaginator(Sale.objects.order_by('-id'), 1).count, 3)
+
+    def test_adjust_stock_action(self):
+        response = self.client.post(reverse('admin:users_products_changelist'), {
+            'action': 'adjust_stock', 'amount': -3, '_selected_action': [self.oud.pk, self.vetiver.pk],
+        }, follow=True)
+
+        self.assertContains(response, "Adjusted stock of 1 products by -3.")
+        self.assertContains(response, "Skipped 1 products without enough stock.")
+        self.assertEqual(Products.objects.get(pk=self.oud.pk).stock, 2)
+        self.assertEqual(Products.objects.get(pk=self.vetiver.pk).stock, 2)
+
+    def test_adjust_stock_keeps_its_guard_against_a_concurrent_sale(self):
+        self.vetiver.stock = 5
+        self.vetiver.save()
+        racing = {"done": False}
+
+        def sale_lands_first(execute, sql, params, many, context):
+            # Vetiver sells down to 1 after the candidates are read, just before the UPDATE
+            if sql.startswith('UPDATE "users_products"') and not racing["done"]:
+                racing["done"] = True
+                context["cursor"].execute('UPDATE "users_products" SET "stock" = 1 WHERE "id" = %s', [self.vetiver.pk])
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(sale_lands_first):
+            adjusted = Products.objects.filter(pk__in=[self.oud.pk, self.vetiver.pk]).adjust_stock(-2, note="count")
+
+        self.assertTrue(racing["done"])
+        self.assertEqual(adjusted, 1)
+        self.assertEqual(Products.objects.get(pk=self.vetiver.pk).stock, 1)
+        self.assertEqual(list(StockMovement.objects.filter(note="count").values_list('product_id', 'quantity')),
+                         [(self.oud.pk, -2)])
+
+
+@isolated
+class VendoredStaticTests(TestCase):
+
+    def assertLinksBootstrap(self, response):
+        self.assertContains(response, static(f"vendor/{BOOTSTRAP_DIR}/css/bootstrap.min.css"))
+        self.assertContains(response, static(f"vendor/{BOOTSTRAP_DIR}/js/bootstrap.min.js"))
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+
+    def test_pages_link_the_vendored_bootstrap(self):
+        self.assertLinksBootstrap(self.client.get(reverse('login')))  # base.html
+
+        self.client.force_login(make_user())
+        self.assertLinksBootstrap(self.client.get(reverse('reports_view')))  # reports.html
+
+    def test_every_asset_is_found_and_not_shadowed(self):
+        app_static = os.path.join(os.path.dirname(__file__), "static", "vendor")
+        for name in ASSETS:
+            with self.subTest(name):
+                self.assertEqual(finders.find(f"vendor/{name}"), os.path.join(app_static, name))
+
+        with open(finders.find(f"vendor/{BOOTSTRAP_DIR}/js/bootstrap.min.js")) as source:
+            self.assertIn("Bootstrap v5.3.0", source.read(200))
+
+    def test_existing_assets_are_kept(self):
+        stdout = StringIO()
+        call_command('vendor_static_assets', stdout=stdout)
+        self.assertEqual(stdout.getvalue().count("Kept "), len(ASSETS))
+
+
+class AnalyticsTests(TestCase):
+
+    def setUp(self):
+        self.day = date(2026, 3, 10)  # A Tuesday
+        self.oud = make_product(stock=100)
+        self.vetiver = make_product(name="Vetiver", stock=100)
+        make_sale(self.oud, quantity=2, sale_date=at(self.day, 9))
+        make_sale(self.oud, quantity=1, sale_date=at(self.day, 9, 30))
+        make_sale(self.vetiver, quantity=4, selling_price="9.00", sale_date=at(self.day + timedelta(days=2), 15))
+
+    def test_daily_totals_fill_empty_days(self):
+        series = sales_totals(self.day - timedelta(days=1), self.day + timedelta(days=4))
+
+        self.assertEqual(series["buckets"][0], np.datetime64("2026-03-09"))
+        self.assertEqual(series["quantity"].tolist(), [0, 3, 0, 4, 0])
+        self.assertEqual(series["revenue"].tolist(), [0.0, 75.0, 0.0, 36.0, 0.0])
+        only_oud = sales_totals(self.day, self.day + timedelta(days=3), product_ids=[self.oud.pk])
+        self.assertEqual(only_oud["quantity"].tolist(), [3, 0, 0])
+
+    def test_hourly_and_weekly_buckets(self):
+        hours = sales_totals(self.day, self.day + timedelta(days=1), "hour")
+        self.assertEqual(len(hours["buckets"]), 24)
+        self.assertEqual(hours["quantity"][9], 3)
+        self.assertEqual(hours["quantity"].sum(), 3)
+
+        weeks = sales_totals(self.day, self.day + timedelta(days=14), "week")
+        self.assertEqual(weeks["buckets"].tolist(), [date(2026, 3, 9), date(2026, 3, 16), date(2026, 3, 23)])
+        self.assertEqual(weeks["quantity"].tolist(), [7, 0, 0])
+
+        with self.assertRaisesMessage(ValueError, "more than the limit"):
+            sales_totals(self.day, self.day + timedelta(days=32), "hour")
+
+    def test_matrix_rows_follow_the_products(self):
+        matrix = sales_matrix(self.day, self.day + timedelta(days=3))
+
+        self.assertEqual([name for _, name, _ in matrix["products"]], ["Oud Noir", "Vetiver"])
+        self.assertEqual(matrix["quantity"].tolist(), [[3, 0, 0], [0, 0, 4]])
+        self.assertEqual(matrix["stock"].tolist(), [97, 96])
+
+    def test_rolling_windows(self):
+        values = np.array([[1, 2, 3, 4], [0, 0, 6, 0]])
+
+        mean = rolling_mean(values, 2)
+        self.assertTrue(np.isnan(mean[:, 0]).all())
+        self.assertEqual(mean[:, 1:].tolist(), [[1.5, 2.5, 3.5], [0.0, 3.0, 3.0]])
+        self.assertEqual(rolling_std(values, 2)[0, 1:].tolist(), [0.5, 0.5, 0.5])
+        self.assertTrue(np.isnan(rolling_mean([1, 2], 3)).all())
+        self.assertEqual(as_list(np.array([1.5, np.nan, np.inf])), [1.5, None, None])
+
+    def test_reorder_suggestions(self):
+        amber = make_product(name="Amber", stock=13)
+        for offset in range(4):
+            make_sale(amber, sale_date=at(self.day - timedelta(days=offset), 12))
+
+        suggestions = reorder_suggestions(today=self.day, lookback_days=4, lead_days=10, cover_days=5)
+
+        # Vetiver only sells after `today`, so it has no velocity and never runs out
+        self.assertEqual([row["name"] for row in suggestions], ["Amber", "Oud Noir", "Vetiver"])
+        self.assertEqual(
+            {key: suggestions[0][key] for key in ("stock", "velocity", "days_left", "reorder_point", "suggested_quantity")},
+            {"stock": 9, "velocity": 1.0, "days_left": 9.0, "reorder_point": 10, "suggested_quantity": 6},
+        )
+        self.assertEqual(suggestions[0]["stockout_date"], self.day + timedelta(days=9))
+        self.assertTrue(suggestions[0]["needs_reorder"])
+        self.assertFalse(suggestions[1]["needs_reorder"])
+        self.assertEqual((suggestions[2]["days_left"], suggestions[2]["needs_reorder"]), (None, False))
+
+
+@isolated
+class AnalyticsViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.product = make_product(stock=10)
+        make_sale(self.product, quantity=2)
+        self.client.force_login(make_user())
+
+    def test_analytics_page(self):
+        for query in ({}, {'bucket': 'hour', 'window': 3}, {'product': 'abc'}, {'product': str(2 ** 70)},
+                      {'bucket': 'week', 'window': 'x', 'start': 'nope'}):
+            with self.subTest(query):
+                response = self.client.get(reverse('sales_analytics'), query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['total_quantity'], 2)
+
+    def test_too_many_buckets_shows_the_widest_window(self):
+        today = localdate()
+        response = self.client.get(reverse('sales_analytics'), {
+            'bucket': 'hour', 'start': (today - timedelta(days=90)).isoformat(), 'end': today.isoformat(),
+        })
+        self.assertContains(response, "Showing the last 30 days")
+        self.assertEqual(len(response.context['rows']), 30 * 24)
+
+    def test_reorder_list(self):
+        response = self.client.get(reverse('reorder_list'), {'all': '1'})
+        self.assertEqual([row['name'] for row in response.context['suggestions']], ["Oud Noir"])
+
+
+@isolated
+class ArchiveTests(TestCase):
+    databases = {'default', 'archive'}
+
+    def setUp(self):
+        clear_caches()
+        self.product = make_product(stock=100)
+        self.old = [
+            make_sale(self.product, quantity=1, customer_details="Amina Noor", sale_date=at(date(2026, 2, 3), 10)),
+            make_sale(self.product, quantity=2, mode_of_payment="Card", sale_date=at(date(2026, 2, 20), 10)),
+        ]
+        self.hot = make_sale(self.product, quantity=4, sale_date=at(date(2026, 3, 5), 10))
+        self.periods = {'all': (date(2026, 1, 1), date(2026, 4, 1))}
+        self.before = build_report(self.periods, "payment")
+
+    def archive(self, before="2026-03-01"):
+        call_command('archive_sales', '--before', before, stdout=StringIO())
+
+    def test_old_sales_move_to_the_archive(self):
+        self.archive()
+
+        self.assertEqual(list(Sale.objects.values_list('pk', flat=True)), [self.hot.pk])
+        archived = ArchivedSale.objects.order_by('id')
+        self.assertEqual([(sale.pk, sale.product_name, sale.quantity) for sale in archived],
+                         [(self.old[0].pk, "Oud Noir", 1), (self.old[1].pk, "Oud Noir", 2)])
+        self.assertEqual(
+            sorted(ArchivedDailySales.objects.values_list('date', 'mode_of_payment', 'quantity', 'revenue', 'cost')),
+            [(date(2026, 2, 3), "Cash", 1, Decimal("25.00"), Decimal("10.00")),
+             (date(2026, 2, 20), "Card", 2, Decimal("50.00"), Decimal("20.00"))],
+        )
+
+        self.archive()  # Nothing left to move
+        self.assertEqual(ArchivedSale.objects.count(), 2)
+        self.assertEqual(ArchivedDailySales.objects.aggregate(units=Sum('quantity'))['units'], 3)
+
+    def test_reports_cover_archived_days(self):
+        product_report = build_report(self.periods)
+        self.archive()
+
+        self.assertEqual(build_report(self.periods, "payment"), self.before)
+        self.assertEqual(build_report(self.periods), product_report)
+        self.assertEqual([(row['label'], row['total_quantity']) for row in self.before['all']['rows']],
+                         [("Card", 2), ("Cash", 5)])
+
+    def test_rebuilt_rollup_keeps_archived_days(self):
+        self.archive()
+        rollup = sorted(DailyProductSales.objects.values_list('date', 'quantity', 'revenue', 'cost', 'profit'))
+
+        call_command('rebuild_sales_rollup', stdout=StringIO())
+
+        self.assertEqual(sorted(DailyProductSales.objects.values_list('date', 'quantity', 'revenue', 'cost', 'profit')),
+                         rollup)
+        self.assertEqual(len(rollup), 3)
+
+    def test_exports_interleave_hot_and_archived_sales(self):
+        self.archive()
+        # A backdated import lands between the two archived sales
+        make_sale(self.product, customer_details="Backdated", sale_date=at(date(2026, 2, 10), 10))
+        self.client.force_login(make_user())
+
+        rows = csv_rows(self.client.get(reverse('export_transactions')))[1:]
+
+        self.assertEqual([row[6] for row in rows], ["Walk-in", "Walk-in", "Backdated", "Amina Noor"])
+        self.assertEqual([row[0][:10] for row in rows], ["2026-03-05", "2026-02-20", "2026-02-10", "2026-02-03"])
+
+    def test_newest_first_merges_on_date_then_id(self):
+        hot = [(3, "c", 7), (1, "a", 9)]
+        archived = [(3, "b", 5), (2, "x", 1), (1, "z", 2)]
+
+        self.assertEqual(list(newest_first([hot, archived])), [(3, "c"), (3, "b"), (2, "x"), (1, "a"), (1, "z")])
+
+
+class ReportingSnapshotTests(TestCase):
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.snapshot_path = self.directory / "reporting.sqlite3"
+        patched = override_settings(REPORTING_SNAPSHOT_PATH=self.snapshot_path)
+        patched.enable()
+        self.addCleanup(patched.disable)
+
+    def test_reads_stay_on_the_main_database_until_a_snapshot_exists(self):
+        self.assertIsNone(snapshot_refreshed_at())
+        with use_snapshot():
+            self.assertFalse(reading_snapshot())
+            self.assertEqual(router.db_for_read(Sale), 'default')
+
+        self.snapshot_path.touch()
+        with use_snapshot():
+            self.assertTrue(reading_snapshot())
+            self.assertEqual(router.db_for_read(Sale), REPORTING_DB)
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_write(Sale), 'default')
+        self.assertFalse(reading_snapshot())
+
+    def test_views_and_their_streams_read_the_snapshot(self):
+        seen = []
+
+        def chunks():
+            for _ in range(2):
+                seen.append(reading_snapshot())
+                yield "chunk"
+
+        @snapshot_reads
+        def view(request):
+            seen.append(reading_snapshot())
+            return StreamingHttpResponse(chunks())
+
+        self.snapshot_path.touch()
+        response = view(RequestFactory().get("/"))
+        self.assertEqual(seen, [True])
+        self.assertFalse(reading_snapshot())
+        self.assertEqual(b"".join(response.streaming_content), b"chunkchunk")
+        self.assertEqual(seen, [True, True, True])
+        self.assertFalse(reading_snapshot())
+
+    def test_refresh_copies_the_main_database(self):
+        source_path = self.directory / "main.sqlite3"
+        with closing(sqlite3.connect(source_path)) as source, source:
+            source.execute("CREATE TABLE sales (quantity INTEGER)")
+            source.executemany("INSERT INTO sales VALUES (?)", [(1,), (2,)])
+
+        with mock.patch.dict(settings.DATABASES['default'], NAME=source_path):
+            call_command('refresh_reporting_snapshot', '--pages', '1', stdout=StringIO())
+            as_of = refresh_snapshot()
+
+        self.assertEqual(snapshot_refreshed_at(), as_of)
+        self.assertFalse(os.path.exists(f"{self.snapshot_path}.partial"))
+        with closing(sqlite3.connect(self.snapshot_path)) as snapshot:
+            self.assertEqual(snapshot.execute("SELECT SUM(quantity) FROM sales").fetchone()[0], 3)
+            self.assertEqual(snapshot.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+
+@isolated
+class CachedModelBackendTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        auth._users.clear()
+        self.backend = CachedModelBackend()
+        self.user = make_user()
+
+    def test_second_lookup_skips_the_database(self):
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            cached = self.backend.get_user(str(self.user.pk))
+        self.assertEqual(cached.username, "cashier")
+
+        self.assertIsNone(self.backend.get_user("abc"))
+        self.assertIsNone(self.backend.get_user(self.user.pk + 1))
+
+    def test_every_request_gets_its_own_copy(self):
+        first = self.backend.get_user(self.user.pk)
+        first.role = User.ADMIN
+        self.assertEqual(self.backend.get_user(self.user.pk).role, User.SHOPKEEPER)
+
+    def test_a_saved_user_is_reloaded(self):
+        self.backend.get_user(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = User.ADMIN
+            self.user.save()
+            # Still the cached user until the change commits
+            self.assertEqual(self.backend.get_user(self.user.pk).role, User.SHOPKEEPER)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(self.user.pk).role, User.ADMIN)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_other_processes_see_the_version_move(self):
+        self.backend.get_user(self.user.pk)
+        # Another worker forgot the user: only the shared version moved
+        caches[settings.AUTH_USER_CACHE_ALIAS].set(f"auth:user:v:{self.user.pk}", 5, None)
+
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.backend.get_user(self.user.pk)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=-1)
+    def test_entries_expire(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+
+@isolated
+class JobTests(TestCase):
+
+    def setUp(self):
+        results = TemporaryDirectory()
+        self.addCleanup(results.cleanup)
+        patched = override_settings(JOB_RESULTS_DIR=results.name)
+        patched.enable()
+        self.addCleanup(patched.disable)
+        clear_caches()
+
+        self.user = make_user()
+        product = make_product(stock=10)
+        make_sale(product, quantity=2, customer_details="Amina Noor")
+        make_sale(product, customer_details="Brian Otieno")
+
+    def queue(self, kind=Job.TRANSACTIONS, **params):
+        return Job.objects.create(kind=kind, params=params, created_by=self.user)
+
+    def test_claim_takes_the_oldest_queued_job_once(self):
+        first, second = self.queue(), self.queue()
+
+        self.assertEqual(Job.objects.claim(), first)
+        self.assertEqual(Job.objects.claim(), second)
+        self.assertIsNone(Job.objects.claim())
+        first.refresh_from_db()
+        self.assertEqual(first.status, Job.RUNNING)
+        self.assertIsNotNone(first.started_at)
+
+    def test_run_job_writes_the_csv(self):
+        job = self.queue(customer="amina")
+        self.assertEqual(run_job(Job.objects.claim()), Job.SUCCEEDED)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.total, job.percent()), (Job.SUCCEEDED, 1, 1, 100))
+        with open(result_path(job), newline="") as result:
+            rows = list(csv.reader(result))
+        self.assertEqual(rows[0], TRANSACTION_EXPORT_HEADER)
+        self.assertEqual([row[6] for row in rows[1:]], ["Amina Noor"])
+
+    def test_sales_report_job(self):
+        today = localdate().isoformat()
+        tomorrow = (localdate() + timedelta(days=1)).isoformat()
+        job = self.queue(Job.SALES_REPORT, group_by="product", periods={"daily": [today, tomorrow]})
+
+        self.assertEqual(run_job(Job.objects.claim()), Job.SUCCEEDED)
+        with open(result_path(job), newline="") as result:
+            self.assertEqual(list(csv.reader(result))[1][:3], ["daily", "Oud Noir", "3"])
+
+    def test_cancel(self):
+        queued = self.queue()
+        queued.cancel()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.CANCELLED)
+        self.assertIsNone(Job.objects.claim())
+
+        running = self.queue()
+        Job.objects.claim()
+        self.assertTrue(running.report_progress(0, 10))
+        running.cancel()
+        self.assertFalse(running.report_progress(5))
+        self.assertEqual(run_job(running), Job.CANCELLED)
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.processed, running.total), (Job.CANCELLED, 0, 10))
+        self.assertFalse(os.path.exists(result_path(running)))
+
+    def test_failures_are_recorded(self):
+        job = self.queue(Job.SALES_REPORT)  # No periods
+
+        with self.assertLogs("users.jobs", "ERROR"):
+            self.assertEqual(run_job(Job.objects.claim()), Job.FAILED)
+        job.refresh_from_db()
+        self.assertIn("KeyError", job.error)
+
+    def test_stale_and_old_jobs_are_swept(self):
+        stale = self.queue()
+        Job.objects.claim()
+        Job.objects.filter(pk=stale.pk).update(updated_at=now() - timedelta(hours=1))
+        self.assertEqual(Job.objects.fail_stale(now() - timedelta(minutes=10)), 1)
+
+        done = self.queue()
+        run_job(Job.objects.claim())
+        self.assertTrue(os.path.exists(result_path(done)))
+        self.assertEqual(prune_jobs(now() - timedelta(days=1)), 0)
+        self.assertEqual(prune_jobs(now() + timedelta(seconds=1)), 2)
+        self.assertFalse(os.path.exists(result_path(done)))
+        self.assertFalse(Job.objects.exists())
+
+
+@isolated
+class JobViewTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user()
+        self.client.force_login(self.owner)
+
+    def test_start_queues_a_job(self):
+        response = self.client.post(reverse('start_job', args=[Job.TRANSACTIONS]) + "?customer=amina&product=")
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertEqual((job.status, job.params, job.created_by), (Job.QUEUED, {"customer": "amina"}, self.owner))
+
+        self.client.post(reverse('start_job', args=[Job.SALES_REPORT]) + "?date=2026-03-10")
+        report = Job.objects.get(kind=Job.SALES_REPORT)
+        self.assertEqual(report.params["periods"]["daily"], ["2026-03-10", "2026-03-11"])
+
+        self.assertEqual(self.client.post(reverse('start_job', args=["everything"])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('start_job', args=[Job.TRANSACTIONS])).status_code, 405)
+
+    def test_jobs_belong_to_their_owner(self):
+        job = Job.objects.create(kind=Job.TRANSACTIONS, created_by=make_user("someone"))
+
+        for name in ('job_detail', 'api_job', 'download_job_result'):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name, args=[job.pk])).status_code, 404)
+        self.client.post(reverse('cancel_job', args=[job.pk]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+        self.owner.is_staff = True
+        self.owner.save()
+        self.assertEqual(self.client.get(reverse('api_job', args=[job.pk])).json()['status'], Job.QUEUED)
+
+    def test_cancel_and_poll(self):
+        job = Job.objects.create(kind=Job.TRANSACTIONS, created_by=self.owner)
+
+        response = self.client.post(reverse('cancel_job', args=[job.pk]))
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        status = self.client.get(reverse('api_job', args=[job.pk])).json()
+        self.assertEqual((status['status'], status['download_url']), (Job.CANCELLED, None))
+        self.assertEqual(self.client.get(reverse('download_job_result', args=[job.pk])).status_code, 404)
@@ -1,8 +1,10 @@
 from django.urls import path
 from .views import (user_login, user_logout, home,
     admin_dashboard, shopkeeper_dashboard,
-    add_product, edit_product, delete_product, product_list, record_sale,
-    sales_report, transaction_list
+    add_product, edit_product, delete_product, product_list, record_sale, record_basket,
+    sales_report, transaction_list, export_sales_report, export_transactions,
+    api_products, api_stock, api_transactions, api_reports, api_customers, performance_stats,
+    sales_analytics, reorder_list, start_job, job_list, job_detail, cancel_job, download_job_result, api_job
 )
 
 urlpatterns = [
@@ -21,6 +23,27 @@ urlpatterns = [
     path('products/edit/<int:product_id>/', edit_product, name='edit_product'),
     path('products/delete/<int:product_id>/', delete_product, name='delete_product'),
     path('sales/record/', record_sale, name='record_sale'),
+    path('sales/basket/', record_basket, name='record_basket'),
     path('reports/', sales_report, name='reports_view'),
+    path('reports/export/', export_sales_report, name='export_sales_report'),
     path("transactions/", transaction_list, name="transaction_list"),
+    path("transactions/export/", export_transactions, name="export_transactions"),
+    path('analytics/', sales_analytics, name='sales_analytics'),
+    path('analytics/reorder/', reorder_list, name='reorder_list'),
+    path('performance/', performance_stats, name='performance_stats'),
+
+    # Background Job Routes
+    path('jobs/', job_list, name='job_list'),
+    path('jobs/start/<str:kind>/', start_job, name='start_job'),
+    path('jobs/<int:job_id>/', job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/cancel/', cancel_job, name='cancel_job'),
+    path('jobs/<int:job_id>/download/', download_job_result, name='download_job_result'),
+
+    # JSON API
+    path('api/products/', api_products, name='api_products'),
+    path('api/stock/', api_stock, name='api_stock'),
+    path('api/transactions/', api_transactions, name='api_transactions'),
+    path('api/reports/', api_reports, name='api_reports'),
+    path('api/customers/', api_customers, name='api_customers'),
+    path('api/jobs/<int:job_id>/', api_job, name='api_job'),
 ]
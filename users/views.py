@@ -1,18 +1,64 @@
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login, logout, authenticate
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Sum, F, ExpressionWrapper, DecimalField
-from django.utils.timezone import now
+from django.core.paginator import Paginator
+from django.conf import settings
+from django.db.models import Max
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.timezone import now, make_aware
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from .forms import RegisterationForm, LoginForm, ProductForm, SalesForm, BasketForm, BasketLineFormSet
+from .models import User, Products, Sale, Customer, Job
+from .pagination import keyset_page
+from .catalog import search_products, low_stock_products, catalog_choices, product_choice_field_choices
+from .reports import GROUPINGS
+from .report_cache import cached_build_report, report_cache_stats
+from .middleware import performance_summary
+from .reporting import snapshot_reads, reading_snapshot, snapshot_refreshed_at
+from .exports import (
+    EXPORT_CHUNK_SIZE, TRANSACTION_EXPORT_HEADER, TRANSACTION_FILTERS, stream_csv, filter_transactions,
+    transactions_for_export, transactions_to_export, newest_first, sales_report_header, sales_report_rows,
+)
+from .jobs import RESULT_FILENAMES, result_path
+from .analytics import (
+    BUCKETS, MAX_BUCKETS, VELOCITY_LOOKBACK_DAYS, REORDER_LEAD_DAYS, REORDER_COVER_DAYS,
+    sales_totals, rolling_mean, rolling_std, as_list, reorder_suggestions,
+)
+
+
+def _month_range(year, month):
+    """ Returns the aware [start, end) datetimes covering a calendar month. """
+    start = make_aware(datetime(year, month, 1))
+    if month == 12:
+        return start, make_aware(datetime(year + 1, 1, 1))
+    return start, make_aware(datetime(year, month + 1, 1))
+
+
+def _dashboard_for(user):
+    """ Name of the URL a user's role lands on, so no request has to bounce through `home`. """
+    if user.is_admin():
+        return 'admin_dashboard'
+    if user.is_shopkeeper():
+        return 'shopkeeper_dashboard'
+    return 'home'
 
-from .forms import RegisterationForm, LoginForm, ProductForm, SalesForm
-from .models import User, Products, Sale
 
+def user_login(request):
+    """ Handles user login, sending the user straight to the page they asked for or their dashboard. """
+    next_url = request.POST.get('next', request.GET.get('next', ''))
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()},
+                                           require_https=request.is_secure()):
+        next_url = ''
 
+    if request.user.is_authenticated and request.method != 'POST':
+        return redirect(next_url or _dashboard_for(request.user))
 
-def user_login(request):
-    """ Handles user login. """
     if request.method == 'POST':
         form = LoginForm(request, data=request.POST)
         if form.is_valid():
@@ -22,29 +68,27 @@ def user_login(request):
 
             if user:
                 login(request, user)
-                return redirect('admin_dashboard' if user.is_admin() else 'shopkeeper_dashboard')
+                return redirect(next_url or _dashboard_for(user))
 
         messages.error(request, "Invalid username or password.")
 
     else:
         form = LoginForm()
 
-    return render(request, 'login.html', {'form': form})
+    return render(request, 'login.html', {'form': form, 'next': next_url})
 
 
 @login_required
 def user_logout(request):
     """ Logs out the current user. """
     logout(request)
-    return redirect('home')
+    return redirect('login')
 
 @login_required 
 def home(request):
     """ Redirects users based on their role. """
-    if request.user.is_admin():
-        return redirect('admin_dashboard')
-    elif request.user.is_shopkeeper():
-        return redirect('shopkeeper_dashboard')
+    if request.user.is_admin() or request.user.is_shopkeeper():
+        return redirect(_dashboard_for(request.user))
 
     return render(request, 'home.html')
 
@@ -54,7 +98,7 @@ def admin_dashboard(request):
     """ Renders the admin dashboard. """
     if not request.user.is_admin():
         messages.error(request, "You are not authorized to access this page.")
-        return redirect('home')
+        return redirect(_dashboard_for(request.user))
 
     return render(request, 'admin_dashboard.html')
 
@@ -64,17 +108,23 @@ def shopkeeper_dashboard(request):
     """ Renders the shopkeeper dashboard. """
     if not request.user.is_shopkeeper():
         messages.error(request, "You are not authorized to access this page.")
-        return redirect('home')
+        return redirect(_dashboard_for(request.user))
 
-    products = Products.objects.all()
-    return render(request, 'shopkeeper_dashboard.html', {'products': products})
+    return render(request, 'shopkeeper_dashboard.html', {'low_stock_products': low_stock_products()})
 
 
 @login_required
 def product_list(request):
-    """ Displays a list of all products. """
-    products = Products.objects.all()
-    return render(request, 'product_list.html', {'products': products})
+    """ Displays a searchable, paginated list of products. """
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search_products(query), settings.PRODUCTS_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+
+    return render(request, 'product_list.html', {
+        'products': page.object_list,
+        'page': page,
+        'query': query,
+    })
 
 
 @login_required
@@ -128,17 +178,12 @@ def record_sale(request):
         if form.is_valid():
             sale = form.save(commit=False)
 
-            if sale.product.stock >= sale.quantity:
-                try:
-                    sale.product.stock -= sale.quantity
-                    sale.product.save()
-                    sale.save()  # Ensure the sale is recorded
-                    messages.success(request, f"Sale recorded: {sale.quantity} x {sale.product.name} at ${sale.selling_price} each")
-                    return redirect('shopkeeper_dashboard')
-
-                except Exception as e:
-                    messages.error(request, f"Error processing sale: {str(e)}")
-            else:
+            try:
+                sale.save()  # Takes the stock and records the sale atomically
+                messages.success(request, f"Sale recorded: {sale.quantity} x {sale.product.name} at ${sale.selling_price} each")
+                return redirect('shopkeeper_dashboard')
+
+            except ValueError:
                 messages.error(request, f"Not enough stock for {sale.product.name}")
 
     else:
@@ -148,15 +193,47 @@ def record_sale(request):
 
 
 @login_required
-def sales_report(request):
-    """Generate daily and monthly profit & loss reports based on user input."""
-    
+def record_basket(request):
+    """ Records a multi-item basket for one customer in a single transaction. """
+    product_choices = product_choice_field_choices()
+    if request.method == 'POST':
+        form = BasketForm(request.POST)
+        formset = BasketLineFormSet(request.POST, prefix='lines', form_kwargs={'product_choices': product_choices})
+        if form.is_valid() and formset.is_valid():
+            lines = [
+                (line['product'], line['quantity'], line['selling_price'])
+                for line in formset.cleaned_data if line
+            ]
+
+            try:
+                sales = Sale.objects.record_basket(
+                    lines, form.cleaned_data['customer_details'], form.cleaned_data['mode_of_payment'],
+                )
+                total = sum(sale.total_price() for sale in sales)
+                messages.success(request, f"Basket recorded: {len(sales)} items, ${total} in total")
+                return redirect('shopkeeper_dashboard')
+
+            except ValueError as e:
+                messages.error(request, str(e))
+
+    else:
+        form = BasketForm()
+        formset = BasketLineFormSet(prefix='lines', form_kwargs={'product_choices': product_choices})
+
+    return render(request, 'record_basket.html', {'form': form, 'formset': formset})
+
+
+def _report_params(request):
+    """ Parses the report filters shared by the report page and its CSV export. """
     today = now().date()
     
     # Get parameters from request
     selected_date = request.GET.get("date", today.strftime("%Y-%m-%d"))
     selected_month = request.GET.get("month", today.month)
     selected_year = request.GET.get("year", today.year)
+    group_by = request.GET.get("group_by", "product")
+    if group_by not in GROUPINGS:
+        group_by = "product"
 
     # Convert selected_date to datetime.date object
     try:
@@ -167,82 +244,489 @@ def sales_report(request):
         
         selected_month = int(selected_month)
         selected_year = int(selected_year)
+        month_start, month_end = _month_range(selected_year, selected_month)
     
     except ValueError:
         selected_date = today
         selected_month = today.month
         selected_year = today.year
+        month_start, month_end = _month_range(selected_year, selected_month)
 
-    # Daily sales report
-    daily_sales_report = (
-        Sale.objects
-        .filter(sale_date__date=selected_date)
-        .values("product__name")
-        .annotate(
-            total_quantity=Sum("quantity"),
-            total_profit=Sum(ExpressionWrapper(
-                F("quantity") * (F("selling_price") - F("product__cost_price")),
-                output_field=DecimalField(max_digits=10, decimal_places=2)
-            ))
-        )
-    )
-
-    # Monthly sales report
-    monthly_sales_report = (
-        Sale.objects
-        .filter(sale_date__month=selected_month, sale_date__year=selected_year)
-        .values("product__name")
-        .annotate(
-            total_quantity=Sum("quantity"),
-            total_profit=Sum(ExpressionWrapper(
-                F("quantity") * (F("selling_price") - F("product__cost_price")),
-                output_field=DecimalField(max_digits=10, decimal_places=2)
-            ))
-        )
-    )
+    periods = {
+        "daily": (selected_date, selected_date + timedelta(days=1)),
+        "monthly": (month_start.date(), month_end.date()),
+    }
 
-    total_daily_profit = sum(sale["total_profit"] for sale in daily_sales_report if sale["total_profit"] is not None)
-    total_monthly_profit = sum(sale["total_profit"] for sale in monthly_sales_report if sale["total_profit"] is not None)
+    # Optional custom period; both ends are inclusive dates
+    start = request.GET.get("start", "")
+    end = request.GET.get("end", "")
+    if start and end:
+        try:
+            periods["custom"] = (
+                datetime.strptime(start, "%Y-%m-%d").date(),
+                datetime.strptime(end, "%Y-%m-%d").date() + timedelta(days=1),
+            )
+        except ValueError:
+            start = end = ""
 
-    return render(request, "reports.html", {
-        "daily_sales_report": daily_sales_report,
-        "monthly_sales_report": monthly_sales_report,
-        "total_daily_profit": total_daily_profit,
-        "total_monthly_profit": total_monthly_profit,
+    return {
+        "periods": periods,
+        "group_by": group_by,
         "selected_date": selected_date,
         "selected_month": selected_month,
         "selected_year": selected_year,
+        "selected_start": start,
+        "selected_end": end,
+    }
+
+
+def _page_size(request):
+    """ Reads the requested page size, clamped to TRANSACTIONS_MAX_PAGE_SIZE. """
+    try:
+        page_size = int(request.GET.get('page_size', settings.TRANSACTIONS_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.TRANSACTIONS_PAGE_SIZE
+    return max(1, min(page_size, settings.TRANSACTIONS_MAX_PAGE_SIZE))
+
+
+def _snapshot_as_of():
+    """ When the data a @snapshot_reads view is showing was copied, or None when it is live. """
+    return snapshot_refreshed_at() if reading_snapshot() else None
+
+
+@login_required
+@snapshot_reads
+def sales_report(request):
+    """Generate daily, monthly and custom-range profit & loss reports based on user input."""
+    params = _report_params(request)
+    group_by = params["group_by"]
+
+    report = cached_build_report(params["periods"], group_by)
+    custom = report.get("custom")
+
+    return render(request, "reports.html", {
+        "daily_sales_report": report["daily"]["rows"],
+        "monthly_sales_report": report["monthly"]["rows"],
+        "custom_sales_report": custom["rows"] if custom else None,
+        "total_daily_profit": report["daily"]["total_profit"],
+        "total_monthly_profit": report["monthly"]["total_profit"],
+        "total_custom_profit": custom["total_profit"] if custom else None,
+        "selected_date": params["selected_date"],
+        "selected_month": params["selected_month"],
+        "selected_year": params["selected_year"],
+        "selected_start": params["selected_start"],
+        "selected_end": params["selected_end"],
+        "group_by": group_by,
+        "group_label": GROUPINGS[group_by],
+        "groupings": GROUPINGS,
+        "export_query": request.GET.urlencode(),
+        "cache_stats": report_cache_stats() if request.user.is_staff else None,
+        "snapshot_as_of": _snapshot_as_of(),
     })
 
+
+@login_required
+@snapshot_reads
+def export_sales_report(request):
+    """ Streams the sales report, with the same filters as the report page, as CSV. """
+    params = _report_params(request)
+    report = cached_build_report(params["periods"], params["group_by"])
+    return stream_csv("sales_report.csv", sales_report_header(params["group_by"]), sales_report_rows(report))
+
     
 @login_required
+@snapshot_reads
 def transaction_list(request):
-    """ View all recorded transactions with filtering options. """
-    transactions = Sale.objects.select_related("product").order_by("-sale_date")
-
+    """ View recorded transactions with filtering options, one keyset page at a time. """
+    transactions = filter_transactions(request.GET, Sale.objects.select_related("product").only(
+        "quantity", "selling_price", "customer_details", "sale_date",
+        "product__name", "unit_cost",
+    ))
     customer = request.GET.get('customer', '')
     product_id = request.GET.get('product', '')
     date = request.GET.get('date', '')
 
-    if customer:
-        transactions = transactions.filter(customer_details__icontains=customer)
-    
-    if product_id:
-        transactions = transactions.filter(product__id=product_id)
-
-    if date:
-        try:
-            date_obj = now().strptime(date, "%Y-%m-%d").date()
-            transactions = transactions.filter(sale_date__date=date_obj)
-        except ValueError:
-            pass  # Ignore invalid date input
+    page = keyset_page(
+        transactions, _page_size(request),
+        after=request.GET.get('after'), before=request.GET.get('before'),
+    )
 
-    products = Products.objects.all()  # For dropdown filter
+    # Next/previous links keep the current filters and only swap the cursor
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    export_query = query.urlencode()
+    next_query = previous_query = None
+    if page["next_cursor"]:
+        query['after'] = page["next_cursor"]
+        next_query = query.urlencode()
+        del query['after']
+    if page["previous_cursor"]:
+        query['before'] = page["previous_cursor"]
+        previous_query = query.urlencode()
+
+    products = catalog_choices()  # For dropdown filter
 
     return render(request, "transactions.html", {
-        "transactions": transactions,
+        "transactions": page["object_list"],
+        "next_query": next_query,
+        "previous_query": previous_query,
         "products": products,
         "selected_customer": customer,
         "selected_product": product_id,
-        "selected_date": date
+        "selected_date": date,
+        "export_query": export_query,
+        "snapshot_as_of": _snapshot_as_of(),
+    })
+
+
+@login_required
+@snapshot_reads
+def export_transactions(request):
+    """ Streams every transaction matching the list filters, archived ones included, as CSV in constant memory. """
+    rows = newest_first(
+        transactions_for_export(transactions, "id").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for transactions in transactions_to_export(request.GET)
+    )
+    return stream_csv("transactions.csv", TRANSACTION_EXPORT_HEADER, rows)
+
+
+
+
+def _user_job(request, job_id):
+    """ One of the current user's jobs (any job, for staff), or a 404. """
+    jobs = Job.objects.all() if request.user.is_staff else Job.objects.filter(created_by=request.user)
+    return get_object_or_404(jobs, pk=job_id)
+
+
+@require_POST
+@login_required
+def start_job(request, kind):
+    """
+    Queues a report or transaction export for `manage.py run_jobs`, with the
+    same query string filters as the streaming exports. Queuing is a single
+    INSERT, so the request takes the same time whatever the export's size.
+    """
+    if kind == Job.SALES_REPORT:
+        report_params = _report_params(request)
+        params = {
+            "group_by": report_params["group_by"],
+            "periods": {
+                name: [start.isoformat(), end.isoformat()]
+                for name, (start, end) in report_params["periods"].items()
+            },
+        }
+    elif kind == Job.TRANSACTIONS:
+        params = {key: request.GET[key] for key in TRANSACTION_FILTERS if request.GET.get(key)}
+    else:
+        raise Http404("Unknown job kind")
+
+    job = Job.objects.create(kind=kind, params=params, created_by=request.user)
+    messages.success(request, f"{job.get_kind_display()} queued. It keeps running if you leave this page.")
+    return redirect('job_detail', job_id=job.pk)
+
+
+@login_required
+def job_list(request):
+    """ The current user's latest background jobs. """
+    jobs = Job.objects.filter(created_by=request.user).order_by('-created_at')[:50]
+    return render(request, 'jobs.html', {'jobs': jobs})
+
+
+@login_required
+def job_detail(request, job_id):
+    """ Progress of one job, refreshing itself until the job finishes, then its download link. """
+    return render(request, 'job_detail.html', {'job': _user_job(request, job_id)})
+
+
+@require_POST
+@login_required
+def cancel_job(request, job_id):
+    """ Cancels a queued job, or asks a running one to stop. """
+    job = _user_job(request, job_id)
+    if not job.is_finished():
+        job.cancel()
+        messages.info(request, "Cancelling the job.")
+    return redirect('job_detail', job_id=job.pk)
+
+
+@login_required
+def download_job_result(request, job_id):
+    """ Sends the CSV a finished job wrote. """
+    job = _user_job(request, job_id)
+    if job.status != Job.SUCCEEDED:
+        raise Http404("The job has no result")
+    try:
+        result = open(result_path(job), 'rb')
+    except FileNotFoundError:
+        raise Http404("The job's result was deleted")
+    return FileResponse(result, as_attachment=True, filename=RESULT_FILENAMES[job.kind], content_type='text/csv')
+
+
+# Default window shown for each analytics bucket, in days
+ANALYTICS_DEFAULT_DAYS = {"hour": 2, "day": 30, "week": 182}
+
+
+def _analytics_params(request):
+    """ Parses the bucket, inclusive date window, moving-average width and product of the analytics page. """
+    today = now().date()
+    bucket = request.GET.get("bucket", "day")
+    if bucket not in BUCKETS:
+        bucket = "day"
+
+    try:
+        window = max(1, min(int(request.GET.get("window", 7)), 90))
+    except ValueError:
+        window = 7
+
+    try:
+        end = datetime.strptime(request.GET.get("end", ""), "%Y-%m-%d").date()
+    except ValueError:
+        end = today
+    try:
+        start = datetime.strptime(request.GET.get("start", ""), "%Y-%m-%d").date()
+    except ValueError:
+        start = end - timedelta(days=ANALYTICS_DEFAULT_DAYS[bucket] - 1)
+    start = min(start, end)
+
+    try:
+        product_id = int(request.GET.get("product", ""))
+    except ValueError:
+        product_id = None
+    if product_id is not None and not 0 < product_id < 2 ** 63:
+        product_id = None  # Would not even fit in the id column
+
+    return {
+        "bucket": bucket,
+        "window": window,
+        "start": start,
+        "end": end,
+        "product_id": product_id,
+    }
+
+
+@login_required
+def sales_analytics(request):
+    """ Sales per hour, day or week over a chosen window, with moving averages. """
+    params = _analytics_params(request)
+    bucket, window = params["bucket"], params["window"]
+    product_ids = [params["product_id"]] if params["product_id"] else None
+
+    try:
+        series = sales_totals(params["start"], params["end"] + timedelta(days=1), bucket, product_ids)
+    except ValueError:
+        # Too many buckets: keep the end and show the widest window allowed,
+        # less one bucket in case the start moves back to a week boundary
+        unit, width = BUCKETS[bucket]
+        span = (MAX_BUCKETS[bucket] - 1) * width // (24 if unit == "h" else 1)
+        params["start"] = params["end"] - timedelta(days=span - 1)
+        messages.warning(request, f"Showing the last {span} days; pick a wider bucket for longer ranges.")
+        series = sales_totals(params["start"], params["end"] + timedelta(days=1), bucket, product_ids)
+    quantity, revenue = series["quantity"], series["revenue"]
+
+    rows = [
+        {
+            "bucket": start,
+            "quantity": int(units),
+            "revenue": amount,
+            "average_quantity": average_units,
+            "spread_quantity": spread_units,
+            "average_revenue": average_amount,
+        }
+        for start, units, amount, average_units, spread_units, average_amount in zip(
+            series["buckets"].tolist(), quantity, as_list(revenue), as_list(rolling_mean(quantity, window)),
+            as_list(rolling_std(quantity, window)), as_list(rolling_mean(revenue, window)),
+        )
+    ]
+
+    return render(request, "analytics.html", {
+        "rows": rows,
+        "total_quantity": int(quantity.sum()),
+        "total_revenue": float(revenue.sum()),
+        "bucket": bucket,
+        "buckets": BUCKETS,
+        "window": window,
+        "selected_start": params["start"].isoformat(),
+        "selected_end": params["end"].isoformat(),
+        "selected_product": params["product_id"],
+        "products": catalog_choices(),
+    })
+
+
+@login_required
+def reorder_list(request):
+    """ Products running out soonest at their recent sales velocity, with reorder quantities. """
+    suggestions = reorder_suggestions()
+    if request.GET.get("all") != "1":
+        suggestions = [row for row in suggestions if row["needs_reorder"]]
+
+    return render(request, "reorder_suggestions.html", {
+        "suggestions": suggestions,
+        "show_all": request.GET.get("all") == "1",
+        "lookback_days": VELOCITY_LOOKBACK_DAYS,
+        "lead_days": REORDER_LEAD_DAYS,
+        "cover_days": REORDER_COVER_DAYS,
+    })
+
+
+@login_required
+@user_passes_test(lambda user: user.is_staff)
+def performance_stats(request):
+    """ Staff-only view of the rolling per-view request statistics. """
+    return render(request, "performance.html", {
+        "enabled": settings.PERF_INSTRUMENTATION,
+        "views": performance_summary(),
+        "window": settings.PERF_WINDOW,
+    })
+
+# JSON API
+#
+# Every endpoint answers conditional GETs from max(updated_at) of the tables
+# it reads - one indexed lookup per table - so a polling client that already
+# has the latest data gets a 304 without the real query ever running. Deleted
+# rows do not move max(updated_at), so deletions show up with the next change.
+# Endpoints whose answer also depends on the clock (reports default to today)
+# fold that into the ETag and send no Last-Modified.
+
+def _latest_change(*models):
+    def latest(request, *args, **kwargs):
+        if not hasattr(request, '_latest_change'):
+            stamps = [model.objects.aggregate(latest=Max('updated_at'))['latest'] for model in models]
+            request._latest_change = max((stamp for stamp in stamps if stamp), default=None)
+        return request._latest_change
+    return latest
+
+
+def _etag_for(latest_change, varies_on=None):
+    def etag(request, *args, **kwargs):
+        stamp = latest_change(request, *args, **kwargs)
+        if stamp is None:
+            return None
+        # The query string is part of the tag so each filtered view gets its own
+        raw = f"{stamp.isoformat()}|{request.get_full_path()}"
+        if varies_on is not None:
+            raw += f"|{varies_on(request)}"
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag
+
+
+def api_conditional(*models, varies_on=None):
+    """
+    Decorates a JSON view with ETag/Last-Modified handling based on `models`.
+
+    `varies_on(request)` returns whatever else the response depends on, such
+    as the report periods resolved against today's date. It goes into the
+    ETag, and Last-Modified is left out, as it cannot express that change.
+    """
+    latest = _latest_change(*models)
+    if varies_on is not None:
+        return condition(etag_func=_etag_for(latest, varies_on))
+    return condition(etag_func=_etag_for(latest), last_modified_func=latest)
+
+
+def _report_periods(request):
+    return sorted(_report_params(request)['periods'].items())
+
+
+@require_GET
+@login_required
+@api_conditional(Products)
+def api_products(request):
+    """ Product catalog. """
+    products = Products.objects.order_by('name').values('id', 'name', 'price', 'description', 'stock')
+    return JsonResponse({'products': list(products)})
+
+
+@require_GET
+@login_required
+@api_conditional(Products)
+def api_stock(request):
+    """ Current stock level of every product. """
+    stock = Products.objects.order_by('name').values('id', 'name', 'stock')
+    return JsonResponse({'stock': list(stock)})
+
+
+@require_GET
+@login_required
+@api_conditional(Sale, Products)
+def api_transactions(request):
+    """ Transactions with the list page's filters, paginated with `after`/`before` cursors. """
+    transactions = filter_transactions(request.GET, Sale.objects.select_related('product').only(
+        'quantity', 'selling_price', 'unit_cost', 'customer_details', 'mode_of_payment', 'sale_date',
+        'product__name',
+    ))
+    page = keyset_page(
+        transactions, _page_size(request),
+        after=request.GET.get('after'), before=request.GET.get('before'),
+    )
+
+    return JsonResponse({
+        'transactions': [
+            {
+                'id': sale.id,
+                'product_id': sale.product_id,
+                'product': sale.product.name,
+                'quantity': sale.quantity,
+                'selling_price': sale.selling_price,
+                'total_price': sale.total_price(),
+                'total_profit': sale.total_profit,
+                'customer_details': sale.customer_details,
+                'mode_of_payment': sale.mode_of_payment,
+                'sale_date': sale.sale_date,
+            }
+            for sale in page['object_list']
+        ],
+        'next_cursor': page['next_cursor'],
+        'previous_cursor': page['previous_cursor'],
+    })
+
+
+@require_GET
+@login_required
+@api_conditional(Sale, Products, varies_on=_report_periods)
+def api_reports(request):
+    """ Report aggregates for the same parameters as the report page. """
+    params = _report_params(request)
+    report = cached_build_report(params['periods'], params['group_by'])
+
+    return JsonResponse({
+        'group_by': params['group_by'],
+        'periods': {
+            name: {
+                'start': params['periods'][name][0],
+                'end': params['periods'][name][1],
+                **section,
+            }
+            for name, section in report.items()
+        },
+    })
+
+
+
+@require_GET
+@login_required
+def api_customers(request):
+    """ Customer autocomplete: up to 10 customers whose name starts with `q`. """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'customers': []})
+
+    customers = Customer.objects.prefix_search(query).order_by('search_key').values('id', 'name', 'phone')[:10]
+    return JsonResponse({'customers': list(customers)})
+
+
+@require_GET
+@login_required
+def api_job(request, job_id):
+    """ Status and progress of one background job, for polling. """
+    job = _user_job(request, job_id)
+    return JsonResponse({
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'processed': job.processed,
+        'total': job.total,
+        'percent': job.percent(),
+        'error': job.error,
+        'download_url': reverse('download_job_result', args=[job.pk]) if job.status == Job.SUCCEEDED else None,
     })